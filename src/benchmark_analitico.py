@@ -0,0 +1,213 @@
+"""
+Carga analítica: relatórios recalculados na hora x agregados mantidos (e cache em processo)
+Executa os relatórios de receita por categoria, principais clientes e pedidos por status de três formas —
+consulta direta (GROUP BY / $group), leitura de agregados mantidos (visões materializadas com REFRESH
+CONCURRENTLY / coleções de resumo com $merge) e agregados mantidos atrás de um cache LRU com TTL — e mede a
+latência das consultas, o custo de atualização dos agregados e a janela de desatualização.
+"""
+
+import argparse
+import time
+from collections import OrderedDict
+from statistics import median
+from db_postgres import *
+from db_mongo import *
+from data_generator import gerar_dados_simulados
+from logger_config import configurar_logger
+from tracing import configurar_tracer, encerrar_tracer, span
+from performance_analyzer import gerar_graficos_analiticos, salvar_resultados_csv
+
+ARQUIVO_CSV_ANALITICO = "logs/resultados_analiticos.csv"
+VARIANTES = ["direto", "materializado", "materializado_cache"]
+
+
+# =============================================================================================================
+# 🔹Cache em processo (LRU com expiração por tempo)
+# =============================================================================================================
+class CacheLRUTTL:
+    def __init__(self, capacidade=128, ttl_s=30.0):
+        self.capacidade = capacidade
+        self.ttl_s = ttl_s
+        self.itens = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave, calcular):
+        """Devolve o valor em cache se ainda válido; caso contrário chama `calcular()` e guarda o resultado."""
+        agora = time.monotonic()
+        if chave in self.itens:
+            valor, expira_em = self.itens[chave]
+            if agora < expira_em:
+                self.itens.move_to_end(chave)
+                self.acertos += 1
+                return valor
+            del self.itens[chave]
+        self.falhas += 1
+        valor = calcular()
+        self.itens[chave] = (valor, agora + self.ttl_s)
+        if len(self.itens) > self.capacidade:
+            self.itens.popitem(last=False)
+        return valor
+
+    def invalidar(self):
+        self.itens.clear()
+
+
+# =============================================================================================================
+# 🔹Funções auxiliares de medição
+# =============================================================================================================
+def medir_latencia(consulta, repeticoes):
+    """Executa a consulta `repeticoes` vezes e devolve a latência mediana (ms) e o último resultado."""
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = consulta()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return median(tempos), resultado
+
+
+def medir_desatualizacao(escrever, ler_materializado, ler_direto, atualizar):
+    """
+    Aplica uma escrita, confirma que o agregado ficou desatualizado e mede a atualização disparada logo em
+    seguida — a menor janela de desatualização possível (COMMIT da escrita → fim da atualização, sem contar
+    as leituras de conferência, que ficam fora da medição). Retorna ms.
+    """
+    escrever()
+    desatualizado = ler_materializado() != ler_direto()
+    inicio = time.perf_counter()
+    atualizar()
+    janela = (time.perf_counter() - inicio) * 1000
+    consistente = ler_materializado() == ler_direto()
+    return janela, desatualizado, consistente
+
+
+# =============================================================================================================
+# 🔹Carga analítica completa
+# =============================================================================================================
+def executar_benchmark_analitico(qtd_clientes=1000, qtd_produtos=500, qtd_pedidos=5000, repeticoes=20,
+    intervalo_refresh_s=60.0, ttl_cache_s=30.0):
+    logger = configurar_logger()
+    configurar_tracer()
+    logger.info("=" * 70)
+    logger.info("INICIANDO CARGA ANALÍTICA - PostgreSQL x MongoDB")
+    logger.info("=" * 70)
+
+    conn_pg, cursor_pg = conectar_postgres(logger)
+    client_mongo, db_mongo = conectar_mongo(logger)
+
+    with span("reset"):
+        limpar_tabelas(cursor_pg, conn_pg, logger)
+        dados = gerar_dados_simulados(qtd_clientes=qtd_clientes, qtd_produtos=qtd_produtos, qtd_pedidos=qtd_pedidos,
+                                      qtd_categorias=5)
+        inserir_dados_postgres(cursor_pg, conn_pg, logger, dados)
+        sincronizar_para_mongo(cursor_pg, db_mongo, logger)
+        criar_visoes_materializadas(cursor_pg, conn_pg, logger)
+        criar_resumos_mongo(db_mongo, logger)
+
+    bancos = {
+        "PostgreSQL": {
+            "relatorios": list(RELATORIOS_PG),
+            "consultar": lambda rel, mat: consultar_relatorio_postgres(cursor_pg, conn_pg, rel, mat),
+            "atualizar": lambda: atualizar_visoes_materializadas(cursor_pg, conn_pg, logger),
+        },
+        "MongoDB": {
+            "relatorios": list(RELATORIOS_MONGO),
+            "consultar": lambda rel, mat: consultar_relatorio_mongo(db_mongo, rel, mat),
+            "atualizar": lambda: atualizar_resumos_mongo(db_mongo, logger),
+        },
+    }
+
+    resultados = []
+    for banco, cfg in bancos.items():
+        consultar = cfg["consultar"]
+
+        # Custo de atualização dos agregados (todas as visões/coleções de resumo)
+        with span(f"refresh {banco.lower()}", banco=banco.lower(), operacao="REFRESH"):
+            tempo_refresh, _ = medir_latencia(cfg["atualizar"], max(repeticoes // 4, 1))
+        janela_max = {
+            "direto": 0,
+            "materializado": intervalo_refresh_s + tempo_refresh / 1000,
+            "materializado_cache": intervalo_refresh_s + tempo_refresh / 1000 + ttl_cache_s,
+        }
+
+        for relatorio in cfg["relatorios"]:
+            cache = CacheLRUTTL(ttl_s=ttl_cache_s)
+            consultas = {
+                "direto": lambda: consultar(relatorio, False),
+                "materializado": lambda: consultar(relatorio, True),
+                "materializado_cache": lambda: cache.obter(relatorio, lambda: consultar(relatorio, True)),
+            }
+            for variante in VARIANTES:
+                with span(f"{relatorio} {variante}", banco=banco.lower(), operacao="SELECT", relatorio=relatorio,
+                          variante=variante) as s:
+                    latencia, linhas = medir_latencia(consultas[variante], repeticoes)
+                    s.set_atributo("linhas", len(linhas))
+                resultados.append({
+                    "banco": banco,
+                    "relatorio": relatorio,
+                    "variante": variante,
+                    "latencia_mediana_ms": round(latencia, 3),
+                    "linhas": len(linhas),
+                    "taxa_acerto_cache_%": round(cache.acertos / repeticoes * 100, 1)
+                    if variante == "materializado_cache" else "",
+                    "tempo_refresh_ms": round(tempo_refresh, 2) if variante != "direto" else 0,
+                    "janela_desatualizacao_max_s": round(janela_max[variante], 2),
+                })
+
+    # Desatualização observada: uma escrita que altera o relatório de pedidos por status
+    def cancelar_pedido_pg():
+        cursor_pg.execute("""
+            UPDATE pedidos SET status = 'Cancelado'
+            WHERE id_pedido = (SELECT MIN(id_pedido) FROM pedidos WHERE status <> 'Cancelado');
+        """)
+        conn_pg.commit()
+
+    escritas = {
+        "PostgreSQL": cancelar_pedido_pg,
+        "MongoDB": lambda: db_mongo.pedidos.update_one({"status": {"$ne": "Cancelado"}},
+                                                       {"$set": {"status": "Cancelado"}}),
+    }
+    for banco, cfg in bancos.items():
+        with span(f"desatualizacao {banco.lower()}", banco=banco.lower(), operacao="UPDATE"):
+            janela, desatualizado, consistente = medir_desatualizacao(
+                escritas[banco],
+                lambda: cfg["consultar"]("pedidos_status", True),
+                lambda: cfg["consultar"]("pedidos_status", False),
+                cfg["atualizar"],
+            )
+        logger.info(f"{banco}: escrita → agregado atualizado em {round(janela, 2)} ms "
+                    f"(desatualizado antes do refresh: {desatualizado}, consistente depois: {consistente}).")
+        for r in resultados:
+            if r["banco"] == banco:
+                r["desatualizacao_observada_ms"] = round(janela, 2) if r["variante"] != "direto" else 0
+
+    salvar_resultados_csv(resultados, ARQUIVO_CSV_ANALITICO)
+
+    gerar_graficos_analiticos(resultados)
+    logger.info("Gráficos da carga analítica gerados em /logs/graficos/")
+
+    logger.info("=" * 70)
+    logger.info("CARGA ANALÍTICA FINALIZADA!")
+    logger.info("=" * 70)
+
+    encerrar_tracer()
+    client_mongo.close()
+    cursor_pg.close()
+    conn_pg.close()
+    return resultados
+
+
+# =============================================================================================================
+# 🔹Ponto de entrada principal
+# =============================================================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatórios analíticos: consulta direta x agregados mantidos.")
+    parser.add_argument("--pedidos", type=int, default=5000, help="quantidade de pedidos gerados")
+    parser.add_argument("--repeticoes", type=int, default=20, help="repetições de cada consulta (usa a mediana)")
+    parser.add_argument("--intervalo-refresh", type=float, default=60.0,
+                        help="intervalo (s) entre atualizações dos agregados em produção")
+    parser.add_argument("--ttl-cache", type=float, default=30.0, help="TTL (s) do cache em processo")
+    args = parser.parse_args()
+    executar_benchmark_analitico(qtd_pedidos=args.pedidos, repeticoes=args.repeticoes,
+                                 intervalo_refresh_s=args.intervalo_refresh, ttl_cache_s=args.ttl_cache)
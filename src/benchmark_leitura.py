@@ -0,0 +1,134 @@
+"""
+Benchmark do caminho de leitura: estratégias de obtenção do resultado no PostgreSQL e no MongoDB
+Lê o mesmo resultado (uma linha por item de pedido) com fetchall, fetchmany, cursor nomeado e COPY binário
+no PostgreSQL, e com lista, cursor em lotes, RawBSONDocument e NumPy no MongoDB, medindo linhas/s e o pico
+de memória do cliente. Cada estratégia roda em um processo novo para que o pico de memória seja só dela.
+"""
+
+import argparse
+import multiprocessing
+import tracemalloc
+from db_postgres import *
+from db_mongo import *
+from data_generator import gerar_dados_simulados
+from resource_monitor import pico_memoria_processo_mb
+from logger_config import configurar_logger
+from tracing import configurar_tracer, encerrar_tracer, span
+from performance_analyzer import gerar_graficos_leitura, salvar_resultados_csv
+
+ARQUIVO_CSV_LEITURA = "logs/resultados_leitura.csv"
+
+
+# =============================================================================================================
+# 🔹Medição isolada de uma estratégia (executada em um processo próprio)
+# =============================================================================================================
+def medir_estrategia(banco, estrategia, tamanho_lote, limite):
+    """
+    Conecta, lê o resultado completo uma vez para medir tempo e pico de RSS e outra vez sob tracemalloc para
+    medir o pico de alocações Python. O RSS inclui buffers de C (libpq/BSON) que o tracemalloc não enxerga.
+    """
+    logger = configurar_logger()
+    if banco == "PostgreSQL":
+        conn, cursor = conectar_postgres(logger)
+        ler = lambda: selecionar_dados_postgres_estrategia(conn, logger, estrategia, tamanho_lote, limite)
+    else:
+        client, db = conectar_mongo(logger)
+        ler = lambda: selecionar_dados_mongo_estrategia(db, logger, estrategia, tamanho_lote, limite)
+
+    rss_base = pico_memoria_processo_mb()
+    medicao = ler()
+    pico_rss = pico_memoria_processo_mb() - rss_base
+
+    tracemalloc.start()
+    ler()
+    pico_python = tracemalloc.get_traced_memory()[1] / (1024 ** 2)
+    tracemalloc.stop()
+
+    if banco == "PostgreSQL":
+        cursor.close()
+        conn.close()
+    else:
+        client.close()
+
+    tempo = medicao["tempo_ms"]
+    return {
+        "banco": banco,
+        "estrategia": estrategia,
+        "tamanho_lote": tamanho_lote if estrategia not in ("fetchall", "list") else "",
+        "linhas": medicao["linhas"],
+        "soma_quantidade": medicao["soma_quantidade"],
+        "tempo_ms": round(tempo, 2),
+        "linhas_s": round(medicao["linhas"] / (tempo / 1000), 2) if tempo > 0 else 0,
+        "pico_rss_MB": round(pico_rss, 2),
+        "pico_python_MB": round(pico_python, 2),
+    }
+
+
+# =============================================================================================================
+# 🔹Benchmark de leitura
+# =============================================================================================================
+def executar_benchmark_leitura(qtd_clientes=1000, qtd_produtos=500, qtd_pedidos=10000, tamanho_lote=1000,
+    limite=None):
+    logger = configurar_logger()
+    configurar_tracer()
+    logger.info("=" * 70)
+    logger.info("INICIANDO BENCHMARK DE ESTRATÉGIAS DE LEITURA - PostgreSQL x MongoDB")
+    logger.info("=" * 70)
+
+    with span("reset"):
+        conn_pg, cursor_pg = conectar_postgres(logger)
+        client_mongo, db_mongo = conectar_mongo(logger)
+        limpar_tabelas(cursor_pg, conn_pg, logger)
+        dados = gerar_dados_simulados(qtd_clientes=qtd_clientes, qtd_produtos=qtd_produtos, qtd_pedidos=qtd_pedidos,
+                                      qtd_categorias=5)
+        inserir_dados_postgres(cursor_pg, conn_pg, logger, dados)
+        sincronizar_para_mongo(cursor_pg, db_mongo, logger)
+        cursor_pg.close()
+        conn_pg.close()
+        client_mongo.close()
+
+    variantes = [("PostgreSQL", e) for e in ESTRATEGIAS_LEITURA_PG] + \
+                [("MongoDB", e) for e in ESTRATEGIAS_LEITURA_MONGO]
+
+    # "spawn" garante um processo limpo (sem a memória do processo pai) para cada estratégia
+    contexto = multiprocessing.get_context("spawn")
+    resultados = []
+    for banco, estrategia in variantes:
+        with span(f"leitura {banco.lower()} {estrategia}", banco=banco.lower(), operacao="SELECT",
+                  tamanho_lote=tamanho_lote) as s:
+            with contexto.Pool(processes=1) as pool:
+                linha = pool.apply(medir_estrategia, (banco, estrategia, tamanho_lote, limite))
+            s.set_atributo("linhas", linha["linhas"])
+        if linha["tempo_ms"] == 0:
+            logger.warning(f"Estratégia {estrategia} ({banco}) não executada; veja o log para detalhes.")
+            continue
+        resultados.append(linha)
+
+    # Todas as estratégias de um mesmo banco devem devolver exatamente o mesmo resultado
+    for banco in ("PostgreSQL", "MongoDB"):
+        conferencias = {(r["linhas"], r["soma_quantidade"]) for r in resultados if r["banco"] == banco}
+        if len(conferencias) > 1:
+            logger.warning(f"Estratégias do {banco} devolveram resultados diferentes: {conferencias}")
+
+    salvar_resultados_csv(resultados, ARQUIVO_CSV_LEITURA)
+
+    gerar_graficos_leitura(resultados)
+    logger.info("Gráficos de estratégias de leitura gerados em /logs/graficos/")
+
+    logger.info("=" * 70)
+    logger.info("BENCHMARK DE LEITURA FINALIZADO!")
+    logger.info("=" * 70)
+    encerrar_tracer()
+    return resultados
+
+
+# =============================================================================================================
+# 🔹Ponto de entrada principal
+# =============================================================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara estratégias de leitura de resultados grandes.")
+    parser.add_argument("--pedidos", type=int, default=10000, help="quantidade de pedidos gerados")
+    parser.add_argument("--lote", type=int, default=1000, help="fetchmany/itersize/batch_size")
+    parser.add_argument("--limite", type=int, help="LIMIT aplicado à consulta (padrão: sem limite)")
+    args = parser.parse_args()
+    executar_benchmark_leitura(qtd_pedidos=args.pedidos, tamanho_lote=args.lote, limite=args.limite)
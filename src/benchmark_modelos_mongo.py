@@ -0,0 +1,98 @@
+"""
+Benchmark de modelos de documento para o SELECT do MongoDB
+Sincroniza os mesmos dados do PostgreSQL em quatro modelos de documento (referência com $lookup, cópias
+embutidas, referência estendida e resumo por cliente) e compara, para cada um, a mesma leitura lógica, o custo
+de escrita (sincronização e propagação de uma alteração de produto) e o armazenamento ocupado.
+"""
+
+import argparse
+from statistics import median
+from db_postgres import *
+from db_mongo import *
+from data_generator import gerar_dados_simulados
+from logger_config import configurar_logger
+from tracing import configurar_tracer, encerrar_tracer, span
+from performance_analyzer import gerar_graficos_modelos_mongo, salvar_resultados_csv
+
+ARQUIVO_CSV_MODELOS = "logs/resultados_modelos_mongo.csv"
+
+
+# =============================================================================================================
+# 🔹Medição de um modelo de documento
+# =============================================================================================================
+def medir_modelo(cursor_pg, db_mongo, logger, modelo, repeticoes=5, id_produto=1):
+    """Sincroniza no modelo indicado e mede leitura (mediana de `repeticoes`), escrita e armazenamento."""
+    with span(f"sincronizacao {modelo}", banco="mongodb", modelo=modelo):
+        tempo_sync = sincronizar_para_mongo(cursor_pg, db_mongo, logger, modelo=modelo)
+
+    with span(f"SELECT {modelo}", banco="mongodb", operacao="SELECT", modelo=modelo, linhas=500):
+        tempos_select = [selecionar_dados_mongo_modelo(db_mongo, logger, modelo) for _ in range(repeticoes)]
+
+    with span(f"UPDATE produto {modelo}", banco="mongodb", operacao="UPDATE", modelo=modelo):
+        tempo_update = atualizar_produto_mongo_modelo(db_mongo, logger, modelo, id_produto, "Produto renomeado")
+
+    colecao = COLECOES_MODELO[modelo]
+    tamanho = tamanho_colecao_mongo(db_mongo, colecao)
+    logger.info(f"Modelo {modelo}: SELECT {round(median(tempos_select), 2)} ms, sincronização "
+                f"{round(tempo_sync, 2)} ms, {tamanho['armazenamento_MB']} MB em {colecao}.")
+    return {
+        "modelo": modelo,
+        "colecao": colecao,
+        "documentos": db_mongo[colecao].estimated_document_count(),
+        "tempo_select_ms": round(median(tempos_select), 2),
+        "tempo_sincronizacao_ms": round(tempo_sync, 2),
+        "tempo_atualizacao_produto_ms": round(tempo_update, 2),
+        "dados_MB": tamanho["dados_MB"],
+        "armazenamento_MB": tamanho["armazenamento_MB"],
+    }
+
+
+# =============================================================================================================
+# 🔹Benchmark dos modelos
+# =============================================================================================================
+def executar_benchmark_modelos(modelos=tuple(COLECOES_MODELO), qtd_clientes=1000, qtd_produtos=500,
+    qtd_pedidos=5000, repeticoes=5):
+    logger = configurar_logger()
+    configurar_tracer()
+    logger.info("=" * 70)
+    logger.info("INICIANDO BENCHMARK DE MODELOS DE DOCUMENTO - MongoDB")
+    logger.info("=" * 70)
+
+    conn_pg, cursor_pg = conectar_postgres(logger)
+    client_mongo, db_mongo = conectar_mongo(logger)
+
+    # O PostgreSQL é a fonte única: todos os modelos são sincronizados a partir dos mesmos dados
+    with span("reset"):
+        limpar_tabelas(cursor_pg, conn_pg, logger)
+        dados = gerar_dados_simulados(qtd_clientes=qtd_clientes, qtd_produtos=qtd_produtos, qtd_pedidos=qtd_pedidos,
+                                      qtd_categorias=5)
+        inserir_dados_postgres(cursor_pg, conn_pg, logger, dados)
+
+    resultados = [medir_modelo(cursor_pg, db_mongo, logger, modelo, repeticoes) for modelo in modelos]
+
+    salvar_resultados_csv(resultados, ARQUIVO_CSV_MODELOS)
+
+    gerar_graficos_modelos_mongo(resultados)
+    logger.info("Gráficos de modelos de documento gerados em /logs/graficos/")
+
+    logger.info("=" * 70)
+    logger.info("BENCHMARK DE MODELOS DE DOCUMENTO FINALIZADO!")
+    logger.info("=" * 70)
+
+    encerrar_tracer()
+    client_mongo.close()
+    cursor_pg.close()
+    conn_pg.close()
+    return resultados
+
+
+# =============================================================================================================
+# 🔹Ponto de entrada principal
+# =============================================================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara modelos de documento do MongoDB para o SELECT.")
+    parser.add_argument("--modelos", nargs="+", choices=list(COLECOES_MODELO), default=list(COLECOES_MODELO))
+    parser.add_argument("--pedidos", type=int, default=5000, help="quantidade de pedidos gerados")
+    parser.add_argument("--repeticoes", type=int, default=5, help="repetições do SELECT (usa a mediana)")
+    args = parser.parse_args()
+    executar_benchmark_modelos(args.modelos, qtd_pedidos=args.pedidos, repeticoes=args.repeticoes)
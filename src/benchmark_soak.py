@@ -0,0 +1,282 @@
+"""
+Teste de longa duração (soak) com carga OLTP mista: PostgreSQL x MongoDB
+Executa leituras pontuais, atualizações de status e inserções de pedidos de forma contínua por um tempo
+configurável (minutos a horas), registrando por segundo o throughput e os percentis de latência junto com as
+amostras do ResourceMonitor. Aponta picos de latência (autovacuum, checkpoints, eviction do cache do
+WiredTiger...) e crescimento monotônico da memória do cliente (vazamento).
+"""
+
+import argparse
+import random
+import time
+from statistics import linear_regression, median, quantiles
+from db_postgres import *
+from db_mongo import *
+from data_generator import gerar_dados_simulados
+from resource_monitor import ResourceMonitor
+from logger_config import configurar_logger
+from utilitarios import balde_latencia
+from tracing import configurar_tracer, encerrar_tracer, span
+from performance_analyzer import gerar_graficos_soak, salvar_resultados_csv
+
+ARQUIVO_CSV_SOAK = "logs/soak_janelas.csv"
+MIX_PADRAO = {"leitura": 0.7, "atualizacao": 0.2, "insercao": 0.1}
+STATUS = ["Pendente", "Pago", "Enviado", "Entregue", "Cancelado"]
+
+
+# =============================================================================================================
+# 🔹Conversão de duração ("90", "30s", "15m", "2h") para segundos
+# =============================================================================================================
+def converter_duracao(texto):
+    unidades = {"s": 1, "m": 60, "h": 3600}
+    texto = str(texto).strip().lower()
+    if texto[-1] in unidades:
+        return float(texto[:-1]) * unidades[texto[-1]]
+    return float(texto)
+
+
+# =============================================================================================================
+# 🔹Carga mista de um banco
+# =============================================================================================================
+def montar_operacoes(banco, conexao, dados, gerador, fila_pedidos=None):
+    """
+    Monta as funções de leitura, atualização e inserção do banco sobre a faixa de ids de pedidos existentes.
+    A inserção recebe o pedido já montado por `novo_pedido`, chamada fora da medição de latência. Com
+    `fila_pedidos`, os novos pedidos (id_pedido, cliente_id, itens) vêm de um processo gerador externo.
+    """
+    ids_pedidos = [p["id_pedido"] for p in dados["pedidos"]]
+    ids_clientes = [c["id_cliente"] for c in dados["clientes"]]
+    produtos = dados["produtos"]
+    proximo_id = [max(ids_pedidos) + 1]
+    # Os ids são sequenciais: guardar só os limites da faixa (e não uma lista que cresce a cada inserção)
+    # mantém o RSS do cliente restrito ao driver, sem confundir o detector de vazamento.
+    menor_id, maior_id = min(ids_pedidos), [max(ids_pedidos)]
+    escolher_id = lambda: gerador.randint(menor_id, maior_id[0])
+
+    def novo_pedido():
+        if fila_pedidos is not None:
+            return fila_pedidos.get(timeout=5)
+        pedido = {
+            "id_pedido": proximo_id[0],
+            "cliente_id": gerador.choice(ids_clientes),
+            "itens": [{"produto_id": p["id_produto"], "quantidade": gerador.randint(1, 3), "preco_unitario": p["preco"]}
+                      for p in gerador.sample(produtos, k=gerador.randint(1, 3))],
+        }
+        proximo_id[0] += 1
+        return pedido
+
+    if banco == "PostgreSQL":
+        cursor, conn = conexao
+        def inserir(pedido):
+            id_pedido = inserir_pedido_postgres(cursor, conn, pedido["cliente_id"], pedido["itens"])
+            maior_id[0] = max(maior_id[0], id_pedido)
+        return {
+            "leitura": lambda: ler_pedido_postgres(cursor, conn, escolher_id()),
+            "atualizacao": lambda: atualizar_status_pedido_postgres(cursor, conn, escolher_id(),
+                                                                    gerador.choice(STATUS)),
+            "insercao": inserir,
+            "novo_pedido": novo_pedido,
+        }
+
+    db = conexao
+    def inserir(pedido):
+        inserir_pedido_mongo(db, pedido["id_pedido"], pedido["cliente_id"], pedido["itens"])
+        maior_id[0] = max(maior_id[0], pedido["id_pedido"])
+    return {
+        "leitura": lambda: ler_pedido_mongo(db, escolher_id()),
+        "atualizacao": lambda: atualizar_status_pedido_mongo(db, escolher_id(), gerador.choice(STATUS)),
+        "insercao": inserir,
+        "novo_pedido": novo_pedido,
+    }
+
+
+def _fechar_janela(banco, segundo, duracao, latencias, erros):
+    # Consolida as latências de uma janela (~1 s) em throughput e percentis.
+    p99 = quantiles(latencias, n=100)[98] if len(latencias) > 1 else (latencias[0] if latencias else 0)
+    return {
+        "banco": banco,
+        "segundo": segundo,
+        "operacoes": len(latencias),
+        "throughput_ops_s": round(len(latencias) / duracao, 2) if duracao > 0 else 0,
+        "latencia_p50_ms": round(median(latencias), 3) if latencias else 0,
+        "latencia_p99_ms": round(p99, 3),
+        "latencia_max_ms": round(max(latencias), 3) if latencias else 0,
+        "erros": erros,
+    }
+
+
+def executar_carga_mista(banco, operacoes, duracao_s, mix, logger, semente=42, intervalo_monitor=1.0, monitorar=True,
+    histograma=None):
+    """
+    Executa a carga mista por `duracao_s` segundos e devolve uma linha por janela de 1 segundo. Com
+    `monitorar=False` o ResourceMonitor não é iniciado (a amostragem fica a cargo de outro processo); com
+    `histograma` (um Counter), cada latência também é acumulada nele em baldes logarítmicos. Operações com
+    erro não entram nas latências nem no throughput, só na coluna `erros`.
+    """
+    gerador = random.Random(semente)
+    tipos, pesos = list(mix), list(mix.values())
+    monitor = ResourceMonitor(interval=intervalo_monitor)
+    if monitorar:
+        monitor.start()
+
+    janelas = []
+    inicio = inicio_janela = time.monotonic()
+    latencias, erros = [], 0
+    while True:
+        agora = time.monotonic()
+        if agora - inicio_janela >= 1.0:
+            janelas.append(_fechar_janela(banco, int(inicio_janela - inicio), agora - inicio_janela, latencias, erros))
+            inicio_janela, latencias, erros = agora, [], 0
+        if agora - inicio >= duracao_s:
+            break
+
+        tipo = gerador.choices(tipos, pesos)[0]
+        try:
+            # O pedido a inserir (montado localmente ou lido da fila do gerador) é obtido antes de t0, para que a
+            # espera pela fila não entre na latência da inserção.
+            argumentos = (operacoes["novo_pedido"](),) if tipo == "insercao" else ()
+            t0 = time.perf_counter()
+            operacoes[tipo](*argumentos)
+        except Exception as e:
+            # Operações com falha entram só em `erros`: a latência de uma falha rápida distorceria os
+            # percentis e o throughput.
+            erros += 1
+            logger.debug(f"Erro na operação {tipo} ({banco}): {e}")
+            continue
+        latencias.append((time.perf_counter() - t0) * 1000)
+        if histograma is not None:
+            histograma[balde_latencia(latencias[-1])] += 1
+
+    if not monitorar:
+        return janelas
+    monitor.stop()
+
+    # Alinha as amostras do ResourceMonitor às janelas (média das amostras de cada segundo)
+    amostras = {}
+    for t, cpu, mem, rss in zip(monitor.timestamps, monitor.cpu_samples, monitor.mem_samples, monitor.rss_samples):
+        amostras.setdefault(int(t - inicio), []).append((cpu, mem, rss))
+    ultima = (0, 0, 0)
+    for janela in janelas:
+        valores = amostras.get(janela["segundo"])
+        if valores:
+            ultima = tuple(sum(v) / len(v) for v in zip(*valores))
+        janela["cpu_%"], janela["memoria_sistema_MB"], janela["rss_cliente_MB"] = (round(v, 2) for v in ultima)
+    return janelas
+
+
+# =============================================================================================================
+# 🔹Detecção de picos de latência e de crescimento de memória
+# =============================================================================================================
+def detectar_picos(janelas, fator=3.0, historico=30, minimo_ms=1.0):
+    """Aponta janelas cujo p99 supera `fator` vezes a mediana dos p99 das `historico` janelas anteriores."""
+    picos = []
+    for i, janela in enumerate(janelas):
+        anteriores = [j["latencia_p99_ms"] for j in janelas[max(0, i - historico):i] if j["operacoes"]]
+        if len(anteriores) < 5:
+            continue
+        referencia = median(anteriores)
+        if janela["latencia_p99_ms"] > max(fator * referencia, minimo_ms):
+            picos.append({"segundo": janela["segundo"], "p99_ms": janela["latencia_p99_ms"],
+                          "referencia_ms": round(referencia, 3)})
+    return picos
+
+
+def detectar_crescimento_memoria(janelas, limiar_mb_min=1.0, blocos=20, aquecimento=0.1):
+    """
+    Ajusta uma reta ao RSS do cliente (descartando o aquecimento) e verifica se as médias de `blocos` trechos
+    consecutivos crescem de forma quase monotônica. Vazamento suspeito = inclinação acima de `limiar_mb_min`
+    MB/min e pelo menos 75% dos trechos maiores que o anterior.
+    """
+    pontos = [(j["segundo"] / 60, j["rss_cliente_MB"]) for j in janelas[int(len(janelas) * aquecimento):]
+              if j["rss_cliente_MB"]]
+    if len(pontos) < blocos * 2:
+        return {"inclinacao_MB_min": 0, "fracao_crescente": 0, "vazamento_suspeito": False}
+
+    inclinacao, _ = linear_regression([p[0] for p in pontos], [p[1] for p in pontos])
+    tamanho = len(pontos) // blocos
+    medias = [sum(p[1] for p in pontos[i:i + tamanho]) / tamanho for i in range(0, tamanho * blocos, tamanho)]
+    fracao = sum(b > a for a, b in zip(medias, medias[1:])) / (len(medias) - 1)
+    return {
+        "inclinacao_MB_min": round(inclinacao, 3),
+        "fracao_crescente": round(fracao, 2),
+        "vazamento_suspeito": inclinacao > limiar_mb_min and fracao >= 0.75,
+    }
+
+
+# =============================================================================================================
+# 🔹Soak completo
+# =============================================================================================================
+def executar_soak(duracao="10m", bancos=("PostgreSQL", "MongoDB"), mix=None, qtd_clientes=1000, qtd_produtos=500,
+    qtd_pedidos=5000):
+    duracao_s = converter_duracao(duracao)
+    mix = mix or MIX_PADRAO
+    logger = configurar_logger()
+    configurar_tracer()
+    logger.info("=" * 70)
+    logger.info(f"INICIANDO SOAK ({duracao_s:.0f}s por banco, mix {mix})")
+    logger.info("=" * 70)
+
+    conn_pg, cursor_pg = conectar_postgres(logger)
+    client_mongo, db_mongo = conectar_mongo(logger)
+
+    with span("reset"):
+        limpar_tabelas(cursor_pg, conn_pg, logger)
+        dados = gerar_dados_simulados(qtd_clientes=qtd_clientes, qtd_produtos=qtd_produtos, qtd_pedidos=qtd_pedidos,
+                                      qtd_categorias=5)
+        inserir_dados_postgres(cursor_pg, conn_pg, logger, dados)
+        sincronizar_para_mongo(cursor_pg, db_mongo, logger)
+        db_mongo.pedidos.create_index("_id_pg", unique=True)  # leitura pontual equivalente à PK do PostgreSQL
+
+    conexoes = {"PostgreSQL": (cursor_pg, conn_pg), "MongoDB": db_mongo}
+    janelas, resumo = [], {}
+    for banco in bancos:
+        operacoes = montar_operacoes(banco, conexoes[banco], dados, random.Random(7))
+        with span(f"soak {banco.lower()}", banco=banco.lower(), duracao_s=duracao_s, **mix) as s:
+            janelas_banco = executar_carga_mista(banco, operacoes, duracao_s, mix, logger)
+            s.set_atributo("linhas", sum(j["operacoes"] for j in janelas_banco))
+        picos = detectar_picos(janelas_banco)
+        memoria = detectar_crescimento_memoria(janelas_banco)
+        for j in janelas_banco:
+            j["pico"] = any(p["segundo"] == j["segundo"] for p in picos)
+        janelas.extend(janelas_banco)
+        resumo[banco] = {"picos": picos, **memoria}
+
+        total = sum(j["operacoes"] for j in janelas_banco)
+        logger.info(f"{banco}: {total} operações, {len(picos)} pico(s) de latência, crescimento de RSS "
+                    f"{memoria['inclinacao_MB_min']} MB/min (vazamento suspeito: {memoria['vazamento_suspeito']}).")
+        for p in picos:
+            logger.warning(f"{banco}: pico de latência no segundo {p['segundo']} "
+                           f"(p99 {p['p99_ms']} ms x referência {p['referencia_ms']} ms).")
+        if memoria["vazamento_suspeito"]:
+            logger.warning(f"{banco}: memória do cliente cresce de forma monotônica — possível vazamento.")
+
+    salvar_resultados_csv(janelas, ARQUIVO_CSV_SOAK)
+
+    gerar_graficos_soak(janelas)
+    logger.info("Gráficos do soak gerados em /logs/graficos/")
+
+    logger.info("=" * 70)
+    logger.info("SOAK FINALIZADO!")
+    logger.info("=" * 70)
+
+    encerrar_tracer()
+    client_mongo.close()
+    cursor_pg.close()
+    conn_pg.close()
+    return janelas, resumo
+
+
+# =============================================================================================================
+# 🔹Ponto de entrada principal
+# =============================================================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga OLTP mista de longa duração (soak).")
+    parser.add_argument("--duracao", default="10m", help="duração por banco: segundos ou 30s, 15m, 2h")
+    parser.add_argument("--bancos", nargs="+", choices=["PostgreSQL", "MongoDB"], default=["PostgreSQL", "MongoDB"])
+    parser.add_argument("--leitura", type=float, default=MIX_PADRAO["leitura"], help="proporção de leituras")
+    parser.add_argument("--atualizacao", type=float, default=MIX_PADRAO["atualizacao"],
+                        help="proporção de atualizações")
+    parser.add_argument("--insercao", type=float, default=MIX_PADRAO["insercao"], help="proporção de inserções")
+    args = parser.parse_args()
+    executar_soak(args.duracao, args.bancos,
+                  {"leitura": args.leitura, "atualizacao": args.atualizacao, "insercao": args.insercao})
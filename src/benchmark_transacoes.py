@@ -0,0 +1,126 @@
+"""
+Varredura de granularidade de transação para UPDATE e DELETE: PostgreSQL x MongoDB
+Aplica as mesmas alterações lógicas do benchmark CRUD como comandos por linha, agrupados em transações
+de 1, 10, 100, 1000 e "todas" as linhas, e compara latência por COMMIT contra throughput em cada banco.
+"""
+
+from statistics import mean, quantiles
+from db_postgres import *
+from db_mongo import *
+from data_generator import gerar_dados_simulados
+from logger_config import configurar_logger
+from tracing import configurar_tracer, encerrar_tracer, span
+from performance_analyzer import gerar_graficos_transacoes, salvar_resultados_csv
+
+# Tamanhos de transação avaliados (None = todas as linhas em uma única transação)
+TAMANHOS_TRANSACAO = [1, 10, 100, 1000, None]
+ARQUIVO_CSV_TRANSACOES = "logs/resultados_transacoes.csv"
+
+
+# =============================================================================================================
+# 🔹Restauração do estado inicial antes de cada tamanho de transação
+# =============================================================================================================
+def preparar_base(cursor_pg, conn_pg, db_mongo, dados, logger):
+    """Recria o mesmo conjunto de dados nas duas bases para que cada variante parta do mesmo estado."""
+    limpar_tabelas(cursor_pg, conn_pg, logger)
+    inserir_dados_postgres(cursor_pg, conn_pg, logger, dados)
+    sincronizar_para_mongo(cursor_pg, db_mongo, logger)
+
+
+# =============================================================================================================
+# 🔹Consolidação das métricas de uma variante
+# =============================================================================================================
+def resumir_variante(operacao, banco, tamanho_transacao, medicao):
+    """Converte a medição bruta (tempo total, latências por transação, linhas) em uma linha de resultado."""
+    latencias = medicao["latencias_ms"]
+    tempo = medicao["tempo_ms"]
+    p95 = quantiles(latencias, n=20)[-1] if len(latencias) > 1 else (latencias[0] if latencias else 0)
+    return {
+        "operacao": operacao,
+        "banco": banco,
+        "tamanho_transacao": tamanho_transacao or "todas",
+        "linhas": medicao["linhas"],
+        "transacoes": len(latencias),
+        "tempo_total_ms": round(tempo, 2),
+        "latencia_media_ms": round(mean(latencias), 3) if latencias else 0,
+        "latencia_p95_ms": round(p95, 3),
+        "throughput_linhas_s": round(medicao["linhas"] / (tempo / 1000), 2) if tempo > 0 else 0,
+    }
+
+
+# =============================================================================================================
+# 🔹Varredura completa
+# =============================================================================================================
+def executar_varredura_transacoes(tamanhos=TAMANHOS_TRANSACAO, qtd_clientes=2000, qtd_produtos=1000,
+    qtd_pedidos=4000):
+    # UPDATE altera todos os produtos e clientes (3000 linhas) e DELETE remove os pedidos com id > 50
+    # (3950 linhas): com milhares de linhas em cada operação, todos os tamanhos de transação são distintos.
+    logger = configurar_logger()
+    configurar_tracer()
+    logger.info("=" * 70)
+    logger.info("INICIANDO VARREDURA DE TAMANHO DE TRANSAÇÃO - PostgreSQL x MongoDB")
+    logger.info("=" * 70)
+
+    conn_pg, cursor_pg = conectar_postgres(logger)
+    client_mongo, db_mongo = conectar_mongo(logger)
+    if not suporta_transacoes(db_mongo):
+        client_mongo.close()
+        cursor_pg.close()
+        conn_pg.close()
+        encerrar_tracer()
+        raise RuntimeError("O MongoDB conectado não é um replica set: transações multi-documento não são "
+                           "suportadas. Inicie o mongod com --replSet e rs.initiate() antes da varredura.")
+
+    logger.info("Gerando dataset simulado...")
+    dados = gerar_dados_simulados(
+        qtd_clientes=qtd_clientes,
+        qtd_produtos=qtd_produtos,
+        qtd_pedidos=qtd_pedidos,
+        qtd_categorias=5,
+    )
+
+    variantes = [
+        ("UPDATE", "PostgreSQL", lambda t: atualizar_dados_postgres_por_linha(cursor_pg, conn_pg, logger, t)),
+        ("UPDATE", "MongoDB", lambda t: atualizar_dados_mongo_por_linha(db_mongo, logger, t)),
+        ("DELETE", "PostgreSQL", lambda t: deletar_dados_postgres_por_linha(cursor_pg, conn_pg, logger, t)),
+        ("DELETE", "MongoDB", lambda t: deletar_dados_mongo_por_linha(db_mongo, logger, t)),
+    ]
+
+    resultados = []
+    for tamanho in tamanhos:
+        logger.info(f"\n Tamanho de transação: {tamanho or 'todas'}")
+        with span("reset", tamanho_lote=tamanho or "todas"):
+            preparar_base(cursor_pg, conn_pg, db_mongo, dados, logger)
+
+        for operacao, banco, executar in variantes:
+            with span(f"{operacao} {banco.lower()}", banco=banco.lower(), operacao=operacao,
+                      tamanho_lote=tamanho or "todas") as s:
+                medicao = executar(tamanho)
+                s.set_atributo("linhas", medicao["linhas"])
+            if medicao["tempo_ms"] == 0:
+                logger.warning(f"{operacao} {banco} (transação={tamanho or 'todas'}) não executado; "
+                               "veja o log para detalhes.")
+                continue
+            resultados.append(resumir_variante(operacao, banco, tamanho, medicao))
+
+    salvar_resultados_csv(resultados, ARQUIVO_CSV_TRANSACOES)
+
+    gerar_graficos_transacoes(resultados)
+    logger.info("Gráficos de granularidade de transação gerados em /logs/graficos/")
+
+    logger.info("=" * 70)
+    logger.info("VARREDURA DE TRANSAÇÕES FINALIZADA!")
+    logger.info("=" * 70)
+
+    encerrar_tracer()
+    client_mongo.close()
+    cursor_pg.close()
+    conn_pg.close()
+    return resultados
+
+
+# =============================================================================================================
+# 🔹Ponto de entrada principal
+# =============================================================================================================
+if __name__ == "__main__":
+    executar_varredura_transacoes()
@@ -1,8 +1,18 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, DeleteOne
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from itertools import groupby
 from decimal import Decimal
 from datetime import datetime
 import time
 import random
+from utilitarios import dividir_em_lotes
+from tracing import span_atual
+
+try:
+    from pymongoarrow.api import Schema, aggregate_numpy_all
+except ImportError:  # dependência opcional, usada apenas pela estratégia de leitura "numpy"
+    Schema = aggregate_numpy_all = None
 
 # =============================================================================================================
 # 🔹 Conexão com MongoDB
@@ -19,6 +29,20 @@ def conectar_mongo(logger):
         logger.exception("Falha ao conectar ao MongoDB: %s", e)
         raise
 
+# =============================================================================================================
+# 🔹 Modelos de documento suportados pela sincronização
+# =============================================================================================================
+# referencia: pedidos só com cliente.id e produto_id (modelo relacional, resolvido com $lookup na leitura)
+# embutido: cópias completas do cliente e de cada produto dentro do pedido
+# referencia_estendida: referência + os campos lidos com frequência (nome do cliente e do produto)
+# resumo_cliente: um documento por cliente com seus pedidos e totais pré-calculados
+COLECOES_MODELO = {
+    "referencia": "pedidos",
+    "embutido": "pedidos_embutidos",
+    "referencia_estendida": "pedidos_ref_estendida",
+    "resumo_cliente": "resumo_clientes",
+}
+
 # =============================================================================================================
 # 🔹 Limpeza das coleções
 # =============================================================================================================
@@ -29,6 +53,8 @@ def limpar_colecoes(db, logger):
         db.categorias.delete_many({})
         db.produtos.delete_many({})
         db.pedidos.delete_many({})
+        for colecao in COLECOES_MODELO.values():
+            db[colecao].delete_many({})
         logger.info("Coleções do MongoDB limpas com sucesso!")
     except Exception as e:
         logger.exception("Erro ao limpar coleções do MongoDB: %s", e)
@@ -60,6 +86,8 @@ def inserir_dados_mongo(db, dados, logger):
             pedidos_embutidos.append(pedido_doc)
 
         db.pedidos.insert_many(pedidos_embutidos)
+        span_atual().set_atributo("linhas", len(dados["categorias"]) + len(dados["clientes"]) +
+                                  len(dados["produtos"]) + len(pedidos_embutidos))
         logger.info(f"Dados inseridos no MongoDB em {round(time.time() - inicio, 2)}s.")
 
         return (time.time() - inicio) * 1000  # tempo em ms
@@ -71,9 +99,9 @@ def inserir_dados_mongo(db, dados, logger):
 # =============================================================================================================
 # 🔹 Sincronização: PostgreSQL → MongoDB
 # =============================================================================================================
-def sincronizar_para_mongo(cursor_pg, db_mongo, logger):
+def sincronizar_para_mongo(cursor_pg, db_mongo, logger, modelo="referencia"):
     """Sincroniza as tabelas PostgreSQL com as coleções MongoDB, convertendo valores do tipo decimal
-       para floats."""
+       para floats. `modelo` define o formato dos pedidos (ver COLECOES_MODELO)."""
     def decimal_to_float(obj):
         if isinstance(obj, list):
             return [decimal_to_float(x) for x in obj]
@@ -169,7 +197,8 @@ def sincronizar_para_mongo(cursor_pg, db_mongo, logger):
         if pedido_dict:
             pedidos_docs.append(decimal_to_float(pedido_dict))
 
-        db_mongo.pedidos.insert_many(pedidos_docs)
+        colecao, docs_modelo = _aplicar_modelo_documento(modelo, pedidos_docs, clientes_docs, produtos_docs)
+        db_mongo[colecao].insert_many(docs_modelo)
 
         logger.info(f"Sincronização concluída ({round(time.time() - inicio, 2)}s).")
         return (time.time() - inicio) * 1000
@@ -178,6 +207,54 @@ def sincronizar_para_mongo(cursor_pg, db_mongo, logger):
         logger.exception("Erro ao sincronizar PostgreSQL → MongoDB: %s", e)
         return 0
 
+def _aplicar_modelo_documento(modelo, pedidos_docs, clientes_docs, produtos_docs):
+    """Converte os pedidos no modelo de referência para o modelo de documento pedido."""
+    if modelo not in COLECOES_MODELO:
+        raise ValueError(f"Modelo de documento desconhecido: {modelo}")
+    if modelo == "referencia":
+        return COLECOES_MODELO[modelo], pedidos_docs
+
+    campos_cliente = ("nome", "cpf", "email", "endereco", "telefone")
+    clientes = {c["_id_pg"]: {"id": c["_id_pg"], **{k: c[k] for k in campos_cliente}} for c in clientes_docs}
+    produtos = {p["_id_pg"]: {"id": p["_id_pg"], "nome": p["nome"], "preco": p["preco"],
+                              "categoria_id": p["categoria_id"]} for p in produtos_docs}
+
+    if modelo == "embutido":
+        docs = [
+            {**pedido,
+             "cliente": clientes[pedido["cliente"]["id"]],
+             "itens": [{"produto": produtos[i["produto_id"]], "quantidade": i["quantidade"],
+                        "preco_unitario": i["preco_unitario"]} for i in pedido["itens"]]}
+            for pedido in pedidos_docs
+        ]
+    elif modelo == "referencia_estendida":
+        docs = [
+            {**pedido,
+             "cliente": {"id": pedido["cliente"]["id"], "nome": clientes[pedido["cliente"]["id"]]["nome"]},
+             "itens": [{**i, "produto_nome": produtos[i["produto_id"]]["nome"]} for i in pedido["itens"]]}
+            for pedido in pedidos_docs
+        ]
+    else:  # resumo_cliente
+        resumos = {}
+        for pedido in pedidos_docs:
+            cliente = clientes[pedido["cliente"]["id"]]
+            resumo = resumos.setdefault(cliente["id"], {
+                "_id_pg": cliente["id"], "nome": cliente["nome"], "email": cliente["email"],
+                "qtd_pedidos": 0, "valor_total": 0.0, "ultimo_pedido": None, "pedidos": [],
+            })
+            resumo["qtd_pedidos"] += 1
+            resumo["valor_total"] = round(resumo["valor_total"] + pedido["valor_total"], 2)
+            resumo["ultimo_pedido"] = max(filter(None, [resumo["ultimo_pedido"], pedido["data_pedido"]]))
+            resumo["pedidos"].append({
+                "id_pedido": pedido["_id_pg"],
+                "data_pedido": pedido["data_pedido"],
+                "valor_total": pedido["valor_total"],
+                "status": pedido["status"],
+                "itens": [{**i, "produto_nome": produtos[i["produto_id"]]["nome"]} for i in pedido["itens"]],
+            })
+        docs = list(resumos.values())
+    return COLECOES_MODELO[modelo], docs
+
 # =============================================================================================================
 # 🔹 Selecionando dados das coleções do MongoDB
 # =============================================================================================================
@@ -188,25 +265,307 @@ def selecionar_dados_mongo(db, logger):
         {"$lookup": {"from": "produtos", "localField": "itens.produto_id", "foreignField": "_id_pg", "as": "produtos_info"}},
         {"$limit": 500}
     ]
-    _ = list(db.pedidos.aggregate(pipeline))
+    documentos = list(db.pedidos.aggregate(pipeline))
+    tempo = (time.perf_counter() - inicio) * 1000
+    span_atual().set_atributo("linhas", len(documentos))
+    return tempo
+
+# =============================================================================================================
+# 🔹 Mesma consulta lógica do SELECT sobre cada modelo de documento
+# =============================================================================================================
+def selecionar_dados_mongo_modelo(db, logger, modelo="referencia"):
+    """Lê 500 pedidos com os dados do cliente e dos produtos, no formato do modelo de documento indicado."""
+    if modelo == "referencia":
+        return selecionar_dados_mongo(db, logger)
+    inicio = time.perf_counter()
+    colecao = db[COLECOES_MODELO[modelo]]
+    if modelo == "resumo_cliente":
+        _ = list(colecao.aggregate([{"$unwind": "$pedidos"}, {"$limit": 500}]))
+    else:
+        _ = list(colecao.find({}, limit=500))
+    return (time.perf_counter() - inicio) * 1000
+
+
+def atualizar_produto_mongo_modelo(db, logger, modelo, id_produto, novo_nome):
+    """
+    Renomeia um produto e propaga a alteração para as cópias desnormalizadas do modelo — o custo de escrita
+    que a desnormalização cobra. Retorna o tempo em ms.
+    """
+    inicio = time.perf_counter()
+    db.produtos.update_one({"_id_pg": id_produto}, {"$set": {"nome": novo_nome}})
+    if modelo == "embutido":
+        db[COLECOES_MODELO[modelo]].update_many(
+            {"itens.produto.id": id_produto},
+            {"$set": {"itens.$[i].produto.nome": novo_nome}},
+            array_filters=[{"i.produto.id": id_produto}])
+    elif modelo == "referencia_estendida":
+        db[COLECOES_MODELO[modelo]].update_many(
+            {"itens.produto_id": id_produto},
+            {"$set": {"itens.$[i].produto_nome": novo_nome}},
+            array_filters=[{"i.produto_id": id_produto}])
+    elif modelo == "resumo_cliente":
+        db[COLECOES_MODELO[modelo]].update_many(
+            {"pedidos.itens.produto_id": id_produto},
+            {"$set": {"pedidos.$[].itens.$[i].produto_nome": novo_nome}},
+            array_filters=[{"i.produto_id": id_produto}])
     return (time.perf_counter() - inicio) * 1000
 
+
+# =============================================================================================================
+# 🔹 Estratégias de leitura do resultado (lista x cursor em lotes x RawBSON x NumPy)
+# =============================================================================================================
+ESTRATEGIAS_LEITURA_MONGO = ["list", "batch_size", "raw_bson", "numpy"]
+
+
+def _pipeline_leitura_mongo(limite=None):
+    # Resultado plano equivalente ao da consulta de leitura do PostgreSQL (uma linha por item de pedido).
+    pipeline = [
+        {"$unwind": "$itens"},
+        {"$sort": {"_id_pg": 1, "itens.produto_id": 1}},
+        {"$lookup": {"from": "clientes", "localField": "cliente.id", "foreignField": "_id_pg", "as": "cliente"}},
+        {"$lookup": {"from": "produtos", "localField": "itens.produto_id", "foreignField": "_id_pg", "as": "produto"}},
+        {"$project": {
+            "_id": 0,
+            "id_pedido": "$_id_pg",
+            "cliente": {"$arrayElemAt": ["$cliente.nome", 0]},
+            "produto": {"$arrayElemAt": ["$produto.nome", 0]},
+            "quantidade": "$itens.quantidade",
+            "preco_unitario": "$itens.preco_unitario",
+        }},
+    ]
+    if limite:
+        pipeline.append({"$limit": int(limite)})
+    return pipeline
+
+
+def selecionar_dados_mongo_estrategia(db, logger, estrategia="list", tamanho_lote=1000, limite=None):
+    """
+    Executa o mesmo pipeline de leitura com a estratégia indicada e consome o resultado inteiro:
+    - list: materializa todos os documentos como dicts (equivalente ao `list(aggregate(...))` atual);
+    - batch_size: itera o cursor com `batch_size = tamanho_lote`, sem guardar os documentos;
+    - raw_bson: itera com `batch_size` devolvendo RawBSONDocument (decodifica só os campos acessados);
+    - numpy: decodifica direto para arrays NumPy via PyMongoArrow (dependência opcional).
+    Retorna tempo (ms), linhas lidas e a soma das quantidades (para conferir que o resultado é o mesmo).
+    """
+    pipeline = _pipeline_leitura_mongo(limite)
+    linhas, soma_quantidade = 0, 0
+
+    try:
+        inicio = time.perf_counter()
+        if estrategia == "list":
+            resultado = list(db.pedidos.aggregate(pipeline))
+            linhas = len(resultado)
+            soma_quantidade = sum(d["quantidade"] for d in resultado)
+        elif estrategia == "batch_size":
+            for d in db.pedidos.aggregate(pipeline, batchSize=tamanho_lote):
+                linhas += 1
+                soma_quantidade += d["quantidade"]
+        elif estrategia == "raw_bson":
+            colecao = db.pedidos.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+            for d in colecao.aggregate(pipeline, batchSize=tamanho_lote):
+                linhas += 1
+                soma_quantidade += d["quantidade"]
+        elif estrategia == "numpy":
+            if aggregate_numpy_all is None:
+                raise RuntimeError("Estratégia 'numpy' requer o pacote pymongoarrow (pip install pymongoarrow).")
+            schema = Schema({"id_pedido": int, "cliente": str, "produto": str, "quantidade": int,
+                             "preco_unitario": float})
+            arrays = aggregate_numpy_all(db.pedidos, pipeline, schema=schema)
+            linhas = len(arrays["quantidade"])
+            soma_quantidade = int(arrays["quantidade"].sum())
+        else:
+            raise ValueError(f"Estratégia de leitura desconhecida: {estrategia}")
+        tempo = (time.perf_counter() - inicio) * 1000
+        logger.info(f"Leitura MongoDB ({estrategia}) de {linhas} documentos em {round(tempo, 2)} ms.")
+        return {"tempo_ms": tempo, "linhas": linhas, "soma_quantidade": soma_quantidade}
+    except Exception as e:
+        logger.exception("Erro na leitura MongoDB (%s): %s", estrategia, e)
+        return {"tempo_ms": 0, "linhas": 0, "soma_quantidade": 0}
+
+# =============================================================================================================
+# 🔹 Operações unitárias para carga contínua (soak)
+# =============================================================================================================
+def ler_pedido_mongo(db, id_pedido):
+    return db.pedidos.find_one({"_id_pg": id_pedido})
+
+
+def atualizar_status_pedido_mongo(db, id_pedido, status):
+    db.pedidos.update_one({"_id_pg": id_pedido}, {"$set": {"status": status}})
+
+
+def inserir_pedido_mongo(db, id_pedido, cliente_id, itens, status="Pendente"):
+    """Insere um pedido no modelo de referência usado pela sincronização."""
+    db.pedidos.insert_one({
+        "_id_pg": id_pedido,
+        "cliente": {"id": cliente_id},
+        "data_pedido": datetime.now(),
+        "valor_total": round(sum(i["quantidade"] * i["preco_unitario"] for i in itens), 2),
+        "status": status,
+        "itens": [dict(i) for i in itens],
+    })
+    return id_pedido
+
+# =============================================================================================================
+# 🔹 Relatórios analíticos: pipeline $group direto x coleções de resumo mantidas com $merge
+# =============================================================================================================
+RELATORIOS_MONGO = {
+    "receita_categoria": {
+        "pipeline": [
+            {"$unwind": "$itens"},
+            {"$lookup": {"from": "produtos", "localField": "itens.produto_id", "foreignField": "_id_pg",
+                         "as": "produto"}},
+            {"$unwind": "$produto"},
+            {"$group": {"_id": "$produto.categoria_id",
+                        "receita": {"$sum": {"$multiply": ["$itens.quantidade", "$itens.preco_unitario"]}}}},
+            {"$lookup": {"from": "categorias", "localField": "_id", "foreignField": "_id_pg", "as": "categoria"}},
+            {"$set": {"categoria": {"$arrayElemAt": ["$categoria.nome", 0]}}},
+        ],
+        "limite": None,
+    },
+    "top_clientes": {
+        "pipeline": [
+            {"$group": {"_id": "$cliente.id", "receita": {"$sum": "$valor_total"}, "qtd_pedidos": {"$sum": 1}}},
+            {"$lookup": {"from": "clientes", "localField": "_id", "foreignField": "_id_pg", "as": "cliente"}},
+            {"$set": {"nome": {"$arrayElemAt": ["$cliente.nome", 0]}}},
+            {"$unset": "cliente"},
+        ],
+        "limite": 10,
+    },
+    "pedidos_status": {
+        "pipeline": [
+            {"$group": {"_id": "$status", "qtd_pedidos": {"$sum": 1}, "receita": {"$sum": "$valor_total"}}},
+        ],
+        "limite": None,
+    },
+}
+
+
+def criar_resumos_mongo(db, logger):
+    """Cria os índices de leitura das coleções de resumo e faz a primeira carga."""
+    for nome in RELATORIOS_MONGO:
+        db[f"resumo_{nome}"].create_index([("receita", -1)])
+    atualizar_resumos_mongo(db, logger)
+    logger.info("Coleções de resumo do MongoDB criadas com sucesso!")
+
+
+def atualizar_resumos_mongo(db, logger):
+    """
+    Recalcula cada relatório e grava o resultado na coleção resumo_<relatorio> com $merge. Grupos que deixaram
+    de existir (não marcados nesta atualização) são removidos em seguida. Retorna o tempo em ms.
+    """
+    try:
+        inicio = time.perf_counter()
+        marca = time.time_ns()
+        for nome, relatorio in RELATORIOS_MONGO.items():
+            db.pedidos.aggregate(relatorio["pipeline"] + [
+                {"$set": {"_atualizacao": marca}},
+                {"$merge": {"into": f"resumo_{nome}", "whenMatched": "replace", "whenNotMatched": "insert"}},
+            ])
+            db[f"resumo_{nome}"].delete_many({"_atualizacao": {"$ne": marca}})
+        return (time.perf_counter() - inicio) * 1000
+    except Exception as e:
+        logger.exception("Erro ao atualizar coleções de resumo do MongoDB: %s", e)
+        return 0
+
+
+def consultar_relatorio_mongo(db, relatorio, materializado=False):
+    """Retorna os documentos do relatório, calculado na hora ($group) ou lido da coleção de resumo."""
+    definicao = RELATORIOS_MONGO[relatorio]
+    ordenacao = [("receita", -1), ("_id", 1)]
+    if materializado:
+        cursor = db[f"resumo_{relatorio}"].find({}, {"_atualizacao": 0}).sort(ordenacao)
+        if definicao["limite"]:
+            cursor = cursor.limit(definicao["limite"])
+        return list(cursor)
+    pipeline = definicao["pipeline"] + [{"$sort": dict(ordenacao)}]
+    if definicao["limite"]:
+        pipeline.append({"$limit": definicao["limite"]})
+    return list(db.pedidos.aggregate(pipeline))
+
 # =============================================================================================================
 # 🔹 Atualização de dados no MongoDB
 # =============================================================================================================
 def atualizar_dados_mongo(db, logger):
     inicio = time.perf_counter()
-    db.produtos.update_many({}, {"$mul": {"preco": 1.1}})
-    db.clientes.update_many({}, {"$set": {"status": "Atualizado"}})
-    return (time.perf_counter() - inicio) * 1000
+    produtos = db.produtos.update_many({}, {"$mul": {"preco": 1.1}})
+    clientes = db.clientes.update_many({}, {"$set": {"status": "Atualizado"}})
+    tempo = (time.perf_counter() - inicio) * 1000
+    span_atual().set_atributo("linhas", produtos.matched_count + clientes.matched_count)
+    return tempo
 
 # =============================================================================================================
 # 🔹 Excluindo dados no MongoDB
 # =============================================================================================================
 def deletar_dados_mongo(db, logger):
     inicio = time.perf_counter()
-    db.pedidos.delete_many({"_id_pg": {"$gt": 50}})
-    return (time.perf_counter() - inicio) * 1000
+    excluidos = db.pedidos.delete_many({"_id_pg": {"$gt": 50}})
+    tempo = (time.perf_counter() - inicio) * 1000
+    span_atual().set_atributo("linhas", excluidos.deleted_count)
+    return tempo
+
+# =============================================================================================================
+# 🔹 Variantes por documento com granularidade de transação configurável
+# =============================================================================================================
+def suporta_transacoes(db):
+    """Transações multi-documento exigem replica set (ou mongos); uma instância standalone as rejeita."""
+    info = db.client.admin.command("ismaster")
+    return "setName" in info or info.get("msg") == "isdbgrid"
+
+
+def _executar_bulk_por_transacao(db, operacoes, tamanho_transacao):
+    """
+    Envia as operações (coleção, operação) via `bulk_write`, uma transação multi-documento a cada
+    `tamanho_transacao` operações. Retorna o tempo total e a latência de cada transação, em ms.
+    Transações exigem que o MongoDB esteja em modo replica set.
+    """
+    latencias = []
+    inicio = time.perf_counter()
+    with db.client.start_session() as sessao:
+        for lote in dividir_em_lotes(operacoes, tamanho_transacao):
+            inicio_lote = time.perf_counter()
+            with sessao.start_transaction():
+                for colecao, ops in groupby(lote, key=lambda op: op[0]):
+                    db[colecao].bulk_write([op for _, op in ops], ordered=False, session=sessao)
+            latencias.append((time.perf_counter() - inicio_lote) * 1000)
+    return (time.perf_counter() - inicio) * 1000, latencias
+
+
+def atualizar_dados_mongo_por_linha(db, logger, tamanho_transacao=None):
+    """
+    Aplica as mesmas alterações de `atualizar_dados_mongo`, mas com um UpdateOne por documento agrupado
+    em transações de `tamanho_transacao` operações (None = todos os documentos em uma única transação).
+    """
+    try:
+        operacoes = [("produtos", UpdateOne({"_id": d["_id"]}, {"$mul": {"preco": 1.1}}))
+                     for d in db.produtos.find({}, {"_id": 1})]
+        operacoes += [("clientes", UpdateOne({"_id": d["_id"]}, {"$set": {"status": "Atualizado"}}))
+                      for d in db.clientes.find({}, {"_id": 1})]
+
+        tempo, latencias = _executar_bulk_por_transacao(db, operacoes, tamanho_transacao)
+        logger.info(f"UPDATE por documento no MongoDB (transação={tamanho_transacao or 'todas'}) "
+                    f"em {round(tempo, 2)} ms.")
+        return {"tempo_ms": tempo, "latencias_ms": latencias, "linhas": len(operacoes)}
+    except Exception as e:
+        logger.exception("Erro ao atualizar documentos por linha no MongoDB: %s", e)
+        return {"tempo_ms": 0, "latencias_ms": [], "linhas": 0}
+
+
+def deletar_dados_mongo_por_linha(db, logger, tamanho_transacao=None):
+    """
+    Aplica a mesma exclusão de `deletar_dados_mongo`, mas com um DeleteOne por documento agrupado em
+    transações de `tamanho_transacao` operações (None = todos os documentos em uma única transação).
+    """
+    try:
+        operacoes = [("pedidos", DeleteOne({"_id": d["_id"]}))
+                     for d in db.pedidos.find({"_id_pg": {"$gt": 50}}, {"_id": 1})]
+
+        tempo, latencias = _executar_bulk_por_transacao(db, operacoes, tamanho_transacao)
+        logger.info(f"DELETE por documento no MongoDB (transação={tamanho_transacao or 'todas'}) "
+                    f"em {round(tempo, 2)} ms.")
+        return {"tempo_ms": tempo, "latencias_ms": latencias, "linhas": len(operacoes)}
+    except Exception as e:
+        logger.exception("Erro ao deletar documentos por linha no MongoDB: %s", e)
+        return {"tempo_ms": 0, "latencias_ms": [], "linhas": 0}
 
 # =============================================================================================================
 # 🔹 Tamanho da base do MongoDB
@@ -215,6 +574,14 @@ def tamanho_mongo(db):
     stats = db.command("dbStats")
     return round(stats["dataSize"] / (1024 ** 2), 2)
 
+def tamanho_colecao_mongo(db, colecao):
+    """Tamanho dos dados e espaço ocupado em disco (dados + índices) de uma coleção, em MB."""
+    stats = db.command("collStats", colecao)
+    return {
+        "dados_MB": round(stats["size"] / (1024 ** 2), 3),
+        "armazenamento_MB": round((stats["storageSize"] + stats["totalIndexSize"]) / (1024 ** 2), 3),
+    }
+
 # =============================================================================================================
 # 🔹 Encerramento da conexão
 # =============================================================================================================
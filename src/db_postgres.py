@@ -1,8 +1,12 @@
 import psycopg2
 from psycopg2 import sql
+import io
+import struct
 import time
 from datetime import datetime
 import random
+from utilitarios import dividir_em_lotes
+from tracing import span_atual
 
 # ===========================================================================================================
 # 🔹 Conexão com PostgreSQL
@@ -94,6 +98,8 @@ def inserir_dados_postgres(cursor, conn, logger, dados=None):
 
         conn.commit()
         tempo = (time.time() - inicio) * 1000
+        span_atual().set_atributo("linhas", sum(len(dados[t]) for t in
+                                                ("categorias", "clientes", "produtos", "pedidos", "itens_pedido")))
         logger.info(f"Dados inseridos no PostgreSQL em {round(tempo, 2)} ms.")
         return tempo
 
@@ -117,12 +123,158 @@ def selecionar_dados_postgres(cursor, conn, logger):
             JOIN produtos pr ON i.produto_id = pr.id_produto
             LIMIT 500;
         """)
-        _ = cursor.fetchall()
-        return (time.perf_counter() - inicio) * 1000
+        linhas = cursor.fetchall()
+        tempo = (time.perf_counter() - inicio) * 1000
+        span_atual().set_atributo("linhas", len(linhas))
+        return tempo
     except Exception as e:
         logger.exception("Erro ao selecionar dados: %s", e)
         return 0
 
+# ===========================================================================================================
+# 🔹 Estratégias de leitura do resultado (fetchall x streaming x COPY binário)
+# ===========================================================================================================
+ESTRATEGIAS_LEITURA_PG = ["fetchall", "fetchmany", "named_cursor", "copy_binary"]
+
+CONSULTA_LEITURA_PG = """
+    SELECT p.id_pedido, c.nome, pr.nome, i.quantidade, i.preco_unitario
+    FROM pedidos p
+    JOIN clientes c ON p.cliente_id = c.id_cliente
+    JOIN itens_pedido i ON p.id_pedido = i.pedido_id
+    JOIN produtos pr ON i.produto_id = pr.id_produto
+    ORDER BY p.id_pedido, i.produto_id
+"""
+
+# No COPY binário os tipos são fixados por cast para que a decodificação seja conhecida
+CONSULTA_LEITURA_PG_COPY = """
+    SELECT p.id_pedido::int8, c.nome::text, pr.nome::text, i.quantidade::int8, i.preco_unitario::float8
+    FROM pedidos p
+    JOIN clientes c ON p.cliente_id = c.id_cliente
+    JOIN itens_pedido i ON p.id_pedido = i.pedido_id
+    JOIN produtos pr ON i.produto_id = pr.id_produto
+    ORDER BY p.id_pedido, i.produto_id
+"""
+
+
+class _LeitorCopyBinario(io.RawIOBase):
+    """
+    Destino do COPY ... TO STDOUT (FORMAT binary) que decodifica as tuplas à medida que os blocos chegam,
+    sem materializar o resultado inteiro. Colunas: int8, text, text, int8, float8.
+    """
+    ASSINATURA = b"PGCOPY\n\xff\r\n\x00"
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.cabecalho_lido = False
+        self.linhas = 0
+        self.soma_quantidade = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self.buffer += dados
+        pos = 0
+        if not self.cabecalho_lido:
+            if len(self.buffer) < 19:
+                return len(dados)
+            tam_extensao = struct.unpack_from(">i", self.buffer, 15)[0]
+            pos = 19 + tam_extensao
+            self.cabecalho_lido = True
+
+        while len(self.buffer) - pos >= 2:
+            qtd_campos = struct.unpack_from(">h", self.buffer, pos)[0]
+            if qtd_campos == -1:  # trailer
+                pos += 2
+                break
+            campos, fim = self._ler_tupla(pos + 2, qtd_campos)
+            if campos is None:  # tupla incompleta, aguarda o próximo bloco
+                break
+            _, _, _, quantidade, _ = campos
+            self.linhas += 1
+            self.soma_quantidade += quantidade
+            pos = fim
+        del self.buffer[:pos]
+        return len(dados)
+
+    def _ler_tupla(self, pos, qtd_campos):
+        campos = []
+        for indice in range(qtd_campos):
+            if len(self.buffer) - pos < 4:
+                return None, pos
+            tamanho = struct.unpack_from(">i", self.buffer, pos)[0]
+            pos += 4
+            if tamanho == -1:
+                campos.append(None)
+                continue
+            if len(self.buffer) - pos < tamanho:
+                return None, pos
+            bruto = self.buffer[pos:pos + tamanho]
+            if indice in (0, 3):
+                campos.append(struct.unpack(">q", bruto)[0])
+            elif indice == 4:
+                campos.append(struct.unpack(">d", bruto)[0])
+            else:
+                campos.append(bruto.decode("utf-8"))
+            pos += tamanho
+        return campos, pos
+
+
+def selecionar_dados_postgres_estrategia(conn, logger, estrategia="fetchall", tamanho_lote=1000, limite=None):
+    """
+    Executa a mesma consulta de pedidos com a estratégia de leitura indicada e consome o resultado inteiro:
+    - fetchall: materializa todas as tuplas de uma vez;
+    - fetchmany: lê em blocos de `tamanho_lote` tuplas;
+    - named_cursor: cursor do lado do servidor com `itersize = tamanho_lote`;
+    - copy_binary: COPY (consulta) TO STDOUT em formato binário, decodificado em streaming.
+    Retorna tempo (ms), linhas lidas e a soma das quantidades (para conferir que o resultado é o mesmo).
+    """
+    consulta = CONSULTA_LEITURA_PG_COPY if estrategia == "copy_binary" else CONSULTA_LEITURA_PG
+    if limite:
+        consulta += f" LIMIT {int(limite)}"
+    linhas, soma_quantidade = 0, 0
+
+    try:
+        inicio = time.perf_counter()
+        if estrategia == "fetchall":
+            cursor = conn.cursor()
+            cursor.execute(consulta)
+            resultado = cursor.fetchall()
+            linhas = len(resultado)
+            soma_quantidade = sum(r[3] for r in resultado)
+        elif estrategia == "fetchmany":
+            cursor = conn.cursor()
+            cursor.execute(consulta)
+            while True:
+                bloco = cursor.fetchmany(tamanho_lote)
+                if not bloco:
+                    break
+                linhas += len(bloco)
+                soma_quantidade += sum(r[3] for r in bloco)
+        elif estrategia == "named_cursor":
+            cursor = conn.cursor(name="leitura_streaming")
+            cursor.itersize = tamanho_lote
+            cursor.execute(consulta)
+            for r in cursor:
+                linhas += 1
+                soma_quantidade += r[3]
+        elif estrategia == "copy_binary":
+            cursor = conn.cursor()
+            leitor = _LeitorCopyBinario()
+            cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT binary)", leitor, size=64 * 1024)
+            linhas, soma_quantidade = leitor.linhas, leitor.soma_quantidade
+        else:
+            raise ValueError(f"Estratégia de leitura desconhecida: {estrategia}")
+        cursor.close()
+        conn.commit()
+        tempo = (time.perf_counter() - inicio) * 1000
+        logger.info(f"Leitura PostgreSQL ({estrategia}) de {linhas} linhas em {round(tempo, 2)} ms.")
+        return {"tempo_ms": tempo, "linhas": linhas, "soma_quantidade": soma_quantidade}
+    except Exception as e:
+        logger.exception("Erro na leitura PostgreSQL (%s): %s", estrategia, e)
+        conn.rollback()
+        return {"tempo_ms": 0, "linhas": 0, "soma_quantidade": 0}
+
 # ===========================================================================================================
 # 🔹 Atualização de dados no PostgreSQL
 # ===========================================================================================================
@@ -131,9 +283,13 @@ def atualizar_dados_postgres(cursor, conn, logger):
     try:
         inicio = time.perf_counter()
         cursor.execute("UPDATE produtos SET preco = preco * 1.1;")
+        linhas = cursor.rowcount
         cursor.execute("UPDATE clientes SET nome = nome || ' (Atualizado)';")
+        linhas += cursor.rowcount
         conn.commit()
-        return (time.perf_counter() - inicio) * 1000
+        tempo = (time.perf_counter() - inicio) * 1000
+        span_atual().set_atributo("linhas", linhas)
+        return tempo
     except Exception as e:
         logger.exception("Erro ao atualizar dados: %s", e)
         conn.rollback()
@@ -147,13 +303,212 @@ def deletar_dados_postgres(cursor, conn, logger):
     try:
         inicio = time.perf_counter()
         cursor.execute("DELETE FROM pedidos WHERE id_pedido > 50;")
+        linhas = cursor.rowcount
         conn.commit()
-        return (time.perf_counter() - inicio) * 1000
+        tempo = (time.perf_counter() - inicio) * 1000
+        span_atual().set_atributo("linhas", linhas)
+        return tempo
     except Exception as e:
         logger.exception("Erro ao deletar dados: %s", e)
         conn.rollback()
         return 0
 
+# ===========================================================================================================
+# 🔹 Variantes por linha com granularidade de transação configurável
+# ===========================================================================================================
+def _executar_por_linha(cursor, conn, comandos, tamanho_transacao):
+    """
+    Executa os comandos (sql, parâmetros) um a um, fazendo COMMIT a cada `tamanho_transacao` comandos.
+    Retorna o tempo total e a latência de cada transação, ambos em ms.
+    """
+    latencias = []
+    inicio = time.perf_counter()
+    for lote in dividir_em_lotes(comandos, tamanho_transacao):
+        inicio_lote = time.perf_counter()
+        for comando, params in lote:
+            cursor.execute(comando, params)
+        conn.commit()
+        latencias.append((time.perf_counter() - inicio_lote) * 1000)
+    return (time.perf_counter() - inicio) * 1000, latencias
+
+
+def atualizar_dados_postgres_por_linha(cursor, conn, logger, tamanho_transacao=None):
+    """
+    Aplica as mesmas alterações de `atualizar_dados_postgres`, mas com um UPDATE por linha agrupado em
+    transações de `tamanho_transacao` comandos (None = todas as linhas em uma única transação).
+    """
+    try:
+        cursor.execute("SELECT id_produto FROM produtos ORDER BY id_produto;")
+        ids_produtos = [r[0] for r in cursor.fetchall()]
+        cursor.execute("SELECT id_cliente FROM clientes ORDER BY id_cliente;")
+        ids_clientes = [r[0] for r in cursor.fetchall()]
+        conn.commit()
+
+        comandos = [("UPDATE produtos SET preco = preco * 1.1 WHERE id_produto = %s;", (i,)) for i in ids_produtos]
+        comandos += [("UPDATE clientes SET nome = nome || ' (Atualizado)' WHERE id_cliente = %s;", (i,))
+                     for i in ids_clientes]
+
+        tempo, latencias = _executar_por_linha(cursor, conn, comandos, tamanho_transacao)
+        logger.info(f"UPDATE por linha no PostgreSQL (transação={tamanho_transacao or 'todas'}) "
+                    f"em {round(tempo, 2)} ms.")
+        return {"tempo_ms": tempo, "latencias_ms": latencias, "linhas": len(comandos)}
+    except Exception as e:
+        logger.exception("Erro ao atualizar dados por linha: %s", e)
+        conn.rollback()
+        return {"tempo_ms": 0, "latencias_ms": [], "linhas": 0}
+
+
+def deletar_dados_postgres_por_linha(cursor, conn, logger, tamanho_transacao=None):
+    """
+    Aplica a mesma exclusão de `deletar_dados_postgres`, mas com um DELETE por linha agrupado em
+    transações de `tamanho_transacao` comandos (None = todas as linhas em uma única transação).
+    """
+    try:
+        cursor.execute("SELECT id_pedido FROM pedidos WHERE id_pedido > 50 ORDER BY id_pedido;")
+        ids_pedidos = [r[0] for r in cursor.fetchall()]
+        conn.commit()
+
+        comandos = [("DELETE FROM pedidos WHERE id_pedido = %s;", (i,)) for i in ids_pedidos]
+
+        tempo, latencias = _executar_por_linha(cursor, conn, comandos, tamanho_transacao)
+        logger.info(f"DELETE por linha no PostgreSQL (transação={tamanho_transacao or 'todas'}) "
+                    f"em {round(tempo, 2)} ms.")
+        return {"tempo_ms": tempo, "latencias_ms": latencias, "linhas": len(comandos)}
+    except Exception as e:
+        logger.exception("Erro ao deletar dados por linha: %s", e)
+        conn.rollback()
+        return {"tempo_ms": 0, "latencias_ms": [], "linhas": 0}
+
+# ===========================================================================================================
+# 🔹 Operações unitárias para carga contínua (soak)
+# ===========================================================================================================
+# Em caso de erro, as operações desfazem a transação antes de propagar a exceção: sem o ROLLBACK a conexão fica
+# em estado de transação abortada e todas as operações seguintes falham imediatamente.
+def ler_pedido_postgres(cursor, conn, id_pedido):
+    """Lê um pedido com seus itens. O COMMIT evita sessões 'idle in transaction' que seguram o autovacuum."""
+    try:
+        cursor.execute("""
+            SELECT p.id_pedido, p.status, p.valor_total, i.produto_id, i.quantidade, i.preco_unitario
+            FROM pedidos p
+            JOIN itens_pedido i ON p.id_pedido = i.pedido_id
+            WHERE p.id_pedido = %s;
+        """, (id_pedido,))
+        linhas = cursor.fetchall()
+        conn.commit()
+        return linhas
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def atualizar_status_pedido_postgres(cursor, conn, id_pedido, status):
+    try:
+        cursor.execute("UPDATE pedidos SET status = %s WHERE id_pedido = %s;", (status, id_pedido))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def inserir_pedido_postgres(cursor, conn, cliente_id, itens, status="Pendente"):
+    """Insere um pedido e seus itens em uma transação. Retorna o id_pedido gerado."""
+    valor_total = round(sum(i["quantidade"] * i["preco_unitario"] for i in itens), 2)
+    try:
+        cursor.execute("""
+            INSERT INTO pedidos (cliente_id, data_pedido, valor_total, status)
+            VALUES (%s, %s, %s, %s)
+            RETURNING id_pedido;
+        """, (cliente_id, datetime.now(), valor_total, status))
+        id_pedido = cursor.fetchone()[0]
+        for item in itens:
+            cursor.execute("""
+                INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unitario)
+                VALUES (%s, %s, %s, %s);
+            """, (id_pedido, item["produto_id"], item["quantidade"], item["preco_unitario"]))
+        conn.commit()
+        return id_pedido
+    except Exception:
+        conn.rollback()
+        raise
+
+# ===========================================================================================================
+# 🔹 Relatórios analíticos: consulta direta (GROUP BY) x visões materializadas
+# ===========================================================================================================
+RELATORIOS_PG = {
+    "receita_categoria": {
+        "sql": """
+            SELECT cat.id_categoria, cat.nome AS categoria, SUM(i.quantidade * i.preco_unitario) AS receita
+            FROM itens_pedido i
+            JOIN produtos pr ON i.produto_id = pr.id_produto
+            JOIN categorias cat ON pr.categoria_id = cat.id_categoria
+            GROUP BY cat.id_categoria, cat.nome
+        """,
+        "chave": "id_categoria",
+        "limite": None,
+    },
+    "top_clientes": {
+        "sql": """
+            SELECT c.id_cliente, c.nome, SUM(p.valor_total) AS receita, COUNT(*) AS qtd_pedidos
+            FROM pedidos p
+            JOIN clientes c ON p.cliente_id = c.id_cliente
+            GROUP BY c.id_cliente, c.nome
+        """,
+        "chave": "id_cliente",
+        "limite": 10,
+    },
+    "pedidos_status": {
+        "sql": """
+            SELECT status, COUNT(*) AS qtd_pedidos, SUM(valor_total) AS receita
+            FROM pedidos
+            GROUP BY status
+        """,
+        "chave": "status",
+        "limite": None,
+    },
+}
+
+
+def criar_visoes_materializadas(cursor, conn, logger):
+    """Cria (se necessário) uma visão materializada por relatório, com o índice único exigido pelo
+    REFRESH ... CONCURRENTLY."""
+    try:
+        for nome, relatorio in RELATORIOS_PG.items():
+            cursor.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS mv_{nome} AS {relatorio['sql']} WITH DATA;")
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS mv_{nome}_chave ON mv_{nome} ({relatorio['chave']});")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS mv_{nome}_receita ON mv_{nome} (receita DESC);")
+        conn.commit()
+        logger.info("Visões materializadas do PostgreSQL criadas com sucesso!")
+    except Exception as e:
+        logger.exception("Erro ao criar visões materializadas: %s", e)
+        conn.rollback()
+
+
+def atualizar_visoes_materializadas(cursor, conn, logger):
+    """Executa REFRESH MATERIALIZED VIEW CONCURRENTLY em todas as visões. Retorna o tempo em ms."""
+    try:
+        inicio = time.perf_counter()
+        for nome in RELATORIOS_PG:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY mv_{nome};")
+            conn.commit()
+        return (time.perf_counter() - inicio) * 1000
+    except Exception as e:
+        logger.exception("Erro ao atualizar visões materializadas: %s", e)
+        conn.rollback()
+        return 0
+
+
+def consultar_relatorio_postgres(cursor, conn, relatorio, materializado=False):
+    """Retorna as linhas do relatório, calculado na hora (GROUP BY) ou lido da visão materializada."""
+    definicao = RELATORIOS_PG[relatorio]
+    origem = f"mv_{relatorio}" if materializado else f"({definicao['sql']}) AS r"
+    consulta = f"SELECT * FROM {origem} ORDER BY receita DESC, {definicao['chave']}"
+    if definicao["limite"]:
+        consulta += f" LIMIT {definicao['limite']}"
+    cursor.execute(consulta + ";")
+    linhas = cursor.fetchall()
+    conn.commit()
+    return linhas
+
 # ===========================================================================================================
 # 🔹 Tamanho da base
 # ===========================================================================================================
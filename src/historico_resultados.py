@@ -0,0 +1,315 @@
+"""
+Histórico de resultados do benchmark e detecção de regressões entre execuções.
+Cada execução é gravada (somente inclusão) em um banco SQLite com identificador, commit do git, tamanho do
+dataset, configuração e informações do host e das versões dos bancos. O comando `comparar` aponta
+regressões estatisticamente significativas de latência ou throughput entre uma execução base e uma candidata.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import uuid
+from datetime import datetime
+from itertools import combinations
+from math import comb
+from statistics import mean
+
+ARQUIVO_HISTORICO = "logs/historico_resultados.sqlite"
+
+# Métricas comparadas e o sentido em que piorar significa regressão
+METRICAS_COMPARADAS = {
+    "tempo_pg_ms": "maior_pior",
+    "tempo_mongo_ms": "maior_pior",
+    "throughput_pg_ops_s": "menor_pior",
+    "throughput_mongo_ops_s": "menor_pior",
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    run_id          TEXT PRIMARY KEY,
+    inicio          TEXT NOT NULL,
+    rotulo          TEXT,
+    git_commit      TEXT,
+    tamanho_dataset TEXT,
+    configuracao    TEXT,
+    host            TEXT
+);
+CREATE TABLE IF NOT EXISTS resultados (
+    run_id   TEXT NOT NULL REFERENCES execucoes(run_id),
+    operacao TEXT NOT NULL,
+    metrica  TEXT NOT NULL,
+    valor    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_resultados_run ON resultados (run_id, operacao, metrica);
+"""
+
+
+# =============================================================================================================
+# 🔹 Conexão com o histórico
+# =============================================================================================================
+def abrir_historico(arquivo=ARQUIVO_HISTORICO):
+    """Abre (e cria, se necessário) o banco SQLite do histórico."""
+    os.makedirs(os.path.dirname(arquivo) or ".", exist_ok=True)
+    conn = sqlite3.connect(arquivo)
+    conn.executescript(ESQUEMA)
+    return conn
+
+
+# =============================================================================================================
+# 🔹 Metadados da execução
+# =============================================================================================================
+def obter_commit_git():
+    """Retorna o hash do commit atual (com sufixo '-dirty' se houver alterações locais) ou None."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        alterado = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if alterado else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def obter_info_host():
+    """Coleta informações do host que executou o benchmark."""
+    info = {
+        "hostname": platform.node(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+    try:
+        import psutil
+        info["memoria_total_MB"] = round(psutil.virtual_memory().total / (1024 ** 2), 2)
+    except ImportError:
+        pass
+    return info
+
+
+def obter_versoes_bancos(conn_pg=None, db_mongo=None):
+    """Obtém as versões dos servidores PostgreSQL e MongoDB, para acompanhar upgrades."""
+    versoes = {}
+    try:
+        if conn_pg is not None:
+            cursor = conn_pg.cursor()
+            cursor.execute("SHOW server_version;")
+            versoes["postgresql"] = cursor.fetchone()[0]
+    except Exception:
+        versoes["postgresql"] = None
+    try:
+        if db_mongo is not None:
+            versoes["mongodb"] = db_mongo.client.server_info()["version"]
+    except Exception:
+        versoes["mongodb"] = None
+    return versoes
+
+
+# =============================================================================================================
+# 🔹 Registro de uma execução
+# =============================================================================================================
+def registrar_execucao(resultados, tamanho_dataset=None, configuracao=None, rotulo=None,
+    arquivo=ARQUIVO_HISTORICO):
+    """
+    Grava uma execução no histórico e retorna o seu run_id. Cada linha de `resultados` deve ter a chave
+    "operacao"; as demais chaves numéricas são armazenadas como métricas.
+    """
+    run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    linhas = [
+        (run_id, r["operacao"], metrica, float(valor))
+        for r in resultados
+        for metrica, valor in r.items()
+        if metrica != "operacao" and isinstance(valor, (int, float))
+    ]
+
+    conn = abrir_historico(arquivo)
+    with conn:
+        conn.execute(
+            "INSERT INTO execucoes VALUES (?, ?, ?, ?, ?, ?, ?);",
+            (run_id, datetime.now().isoformat(timespec="seconds"), rotulo, obter_commit_git(),
+             json.dumps(tamanho_dataset or {}), json.dumps(configuracao or {}, default=str),
+             json.dumps(obter_info_host())),
+        )
+        conn.executemany("INSERT INTO resultados VALUES (?, ?, ?, ?);", linhas)
+    conn.close()
+    return run_id
+
+
+# =============================================================================================================
+# 🔹 Consultas ao histórico
+# =============================================================================================================
+def listar_execucoes(arquivo=ARQUIVO_HISTORICO):
+    """Lista as execuções registradas, da mais antiga para a mais recente."""
+    conn = abrir_historico(arquivo)
+    conn.row_factory = sqlite3.Row
+    execucoes = [dict(r) for r in conn.execute("SELECT * FROM execucoes ORDER BY inicio, rowid;")]
+    conn.close()
+    return execucoes
+
+
+def _resolver_execucoes(conn, seletores, incluir_perfilados=False):
+    # Um seletor é um run_id exato ou um rótulo (seleciona todas as execuções com aquele rótulo). Execuções
+    # perfiladas (cProfile/tracemalloc inflam os tempos) só entram por rótulo com `incluir_perfilados`.
+    run_ids = []
+    for seletor in seletores:
+        encontrados = [r[0] for r in conn.execute(
+            "SELECT run_id FROM execucoes WHERE run_id = ? OR (rotulo = ? AND (? OR "
+            "COALESCE(json_extract(configuracao, '$.perfil'), 0) = 0)) ORDER BY inicio, rowid;",
+            (seletor, seletor, incluir_perfilados))]
+        if not encontrados:
+            raise ValueError(f"Nenhuma execução encontrada para '{seletor}'"
+                             f"{'' if incluir_perfilados else ' (execuções perfiladas são ignoradas)'}.")
+        run_ids.extend(encontrados)
+    return run_ids
+
+
+def carregar_amostras(seletores, arquivo=ARQUIVO_HISTORICO, incluir_perfilados=False):
+    """Retorna {(operacao, metrica): [valores]} para as execuções selecionadas."""
+    conn = abrir_historico(arquivo)
+    run_ids = _resolver_execucoes(conn, seletores, incluir_perfilados)
+    marcadores = ", ".join("?" * len(run_ids))
+    amostras = {}
+    for operacao, metrica, valor in conn.execute(
+            f"SELECT operacao, metrica, valor FROM resultados WHERE run_id IN ({marcadores});", run_ids):
+        amostras.setdefault((operacao, metrica), []).append(valor)
+    conn.close()
+    return amostras
+
+
+def carregar_resultados_historico(seletores, arquivo=ARQUIVO_HISTORICO, incluir_perfilados=False):
+    """Reconstrói as linhas no formato de `resultados_crud.csv` (uma por operação e execução)."""
+    conn = abrir_historico(arquivo)
+    run_ids = _resolver_execucoes(conn, seletores, incluir_perfilados)
+    marcadores = ", ".join("?" * len(run_ids))
+    linhas = {}
+    for run_id, operacao, metrica, valor in conn.execute(
+            f"SELECT run_id, operacao, metrica, valor FROM resultados WHERE run_id IN ({marcadores}) "
+            f"ORDER BY rowid;", run_ids):
+        linhas.setdefault((run_id, operacao), {"operacao": operacao})[metrica] = valor
+    conn.close()
+    return list(linhas.values())
+
+
+# =============================================================================================================
+# 🔹 Detecção de regressões
+# =============================================================================================================
+def p_valor_minimo(n_base, n_candidato):
+    """Menor p-valor bicaudal que o teste de permutação consegue atingir com esses tamanhos de amostra."""
+    particoes = comb(n_base + n_candidato, n_base)
+    return min(1.0, (2 if n_base == n_candidato else 1) / particoes)
+
+
+def teste_permutacao(base, candidato, permutacoes=10000, semente=42):
+    """
+    P-valor bicaudal da diferença de médias por teste de permutação (sem dependências externas). Com poucas
+    amostras todas as partições são enumeradas (teste exato); caso contrário, `permutacoes` sorteios.
+    """
+    observada = abs(mean(candidato) - mean(base))
+    combinadas = list(base) + list(candidato)
+    n_base = len(base)
+    if comb(len(combinadas), n_base) <= permutacoes:
+        indices = range(len(combinadas))
+        extremos = total = 0
+        for escolhidos in combinations(indices, n_base):
+            escolhidos = set(escolhidos)
+            grupo_base = [combinadas[i] for i in escolhidos]
+            grupo_cand = [combinadas[i] for i in indices if i not in escolhidos]
+            # Tolerância para empates numéricos com a partição observada
+            extremos += abs(mean(grupo_cand) - mean(grupo_base)) >= observada * (1 - 1e-9)
+            total += 1
+        return extremos / total
+
+    gerador = random.Random(semente)
+    extremos = 0
+    for _ in range(permutacoes):
+        gerador.shuffle(combinadas)
+        if abs(mean(combinadas[n_base:]) - mean(combinadas[:n_base])) >= observada:
+            extremos += 1
+    return (extremos + 1) / (permutacoes + 1)
+
+
+def comparar_execucoes(base, candidato, alfa=0.05, limiar_pct=5.0, arquivo=ARQUIVO_HISTORICO,
+    incluir_perfilados=False):
+    """
+    Compara as métricas de latência e throughput entre as execuções `base` e `candidato` (listas de run_ids
+    ou rótulos). Uma regressão é apontada quando a métrica piora mais que `limiar_pct` e a diferença é
+    significativa ao nível `alfa`. Quando há tão poucas repetições que nem a partição mais extrema atinge
+    `alfa` (ex.: 1 a 3 por lado), o teste não pode decidir: a comparação é marcada com criterio="limiar"
+    (estatisticamente inconclusiva) e vale apenas o limiar — assim, acrescentar repetições nunca torna uma
+    piora indetectável por falta de poder do teste. Execuções perfiladas selecionadas por rótulo são
+    ignoradas, a menos que `incluir_perfilados` seja verdadeiro.
+    """
+    amostras_base = carregar_amostras(base, arquivo, incluir_perfilados)
+    amostras_cand = carregar_amostras(candidato, arquivo, incluir_perfilados)
+
+    comparacoes = []
+    for (operacao, metrica), valores_base in sorted(amostras_base.items()):
+        if metrica not in METRICAS_COMPARADAS or (operacao, metrica) not in amostras_cand:
+            continue
+        valores_cand = amostras_cand[(operacao, metrica)]
+        media_base, media_cand = mean(valores_base), mean(valores_cand)
+        variacao = (media_cand - media_base) / media_base * 100 if media_base else 0.0
+        piora = variacao if METRICAS_COMPARADAS[metrica] == "maior_pior" else -variacao
+
+        if p_valor_minimo(len(valores_base), len(valores_cand)) < alfa:
+            p_valor = teste_permutacao(valores_base, valores_cand)
+            significativa, criterio = p_valor < alfa, "permutacao"
+        else:
+            p_valor, significativa, criterio = None, True, "limiar"
+
+        comparacoes.append({
+            "operacao": operacao,
+            "metrica": metrica,
+            "media_base": round(media_base, 2),
+            "media_candidato": round(media_cand, 2),
+            "variacao_%": round(variacao, 2),
+            "p_valor": round(p_valor, 4) if p_valor is not None else None,
+            "criterio": criterio,
+            "regressao": significativa and piora > limiar_pct,
+            "melhoria": significativa and piora < -limiar_pct,
+        })
+    return comparacoes
+
+
+# ==============================================================================================================
+# 🔹 Execução direta
+# ==============================================================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Histórico de execuções do benchmark.")
+    parser.add_argument("--arquivo", default=ARQUIVO_HISTORICO)
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    subcomandos.add_parser("listar", help="lista as execuções registradas")
+    comparar = subcomandos.add_parser("comparar", help="aponta regressões entre execução base e candidata")
+    comparar.add_argument("--base", nargs="+", required=True, help="run_id(s) ou rótulo(s) da execução base")
+    comparar.add_argument("--candidato", nargs="+", required=True, help="run_id(s) ou rótulo(s) da candidata")
+    comparar.add_argument("--alfa", type=float, default=0.05, help="nível de significância (padrão 0.05)")
+    comparar.add_argument("--limiar", type=float, default=5.0, help="piora mínima em %% (padrão 5)")
+    comparar.add_argument("--incluir-perfilados", action="store_true",
+                          help="inclui execuções com --perfil selecionadas por rótulo (tempos inflados)")
+    args = parser.parse_args()
+
+    if args.comando == "listar":
+        for e in listar_execucoes(args.arquivo):
+            perfilada = json.loads(e["configuracao"] or "{}").get("perfil")
+            print(f"{e['run_id']}  {e['inicio']}  rótulo={e['rotulo'] or '-'}  commit={(e['git_commit'] or '-')[:12]}"
+                  f"  dataset={e['tamanho_dataset']}{'  [perfilada]' if perfilada else ''}")
+    else:
+        resultado = comparar_execucoes(args.base, args.candidato, args.alfa, args.limiar, args.arquivo,
+                                       args.incluir_perfilados)
+        regressoes = [c for c in resultado if c["regressao"]]
+        for c in resultado:
+            marca = "[✘ REGRESSÃO]" if c["regressao"] else ("[✔ melhoria]" if c["melhoria"] else "[ ]")
+            print(f"{marca:15} {c['operacao']:8} {c['metrica']:24} base={c['media_base']:>12} "
+                  f"candidato={c['media_candidato']:>12} variação={c['variacao_%']:>8}% p={c['p_valor']}"
+                  f" critério={c['criterio']}")
+        if any(c["criterio"] == "limiar" for c in resultado):
+            minimo = next(n for n in range(1, 100) if p_valor_minimo(n, n) < args.alfa)
+            print(f"\n[!] Repetições insuficientes para atingir alfa={args.alfa} em parte das métricas: essas "
+                  f"comparações são estatisticamente inconclusivas e foram decididas apenas pelo limiar de "
+                  f"{args.limiar}%. Com {minimo} ou mais execuções de cada lado o teste de permutação passa a valer.")
+        print(f"\n{len(regressoes)} regressão(ões) detectada(s).")
+        raise SystemExit(1 if regressoes else 0)
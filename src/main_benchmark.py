@@ -4,48 +4,60 @@ Executa operações CRUD em ambas as bases, coleta métricas de tempo, CPU, mem
 throughput e tamanho das bases, e gera relatórios gráficos comparativos.
 """
 
+import argparse
 import os
-import csv
+from datetime import datetime
 from db_postgres import *
 from db_mongo import *
 from data_generator import gerar_dados_simulados
 from resource_monitor import ResourceMonitor
 from logger_config import configurar_logger
-from performance_analyzer import gerar_graficos_comparativos
+from profiler import perfilar, colunas_perfil, PASTA_PERFIS, MODOS_PERFIL
+from tracing import configurar_tracer, encerrar_tracer, span
+from performance_analyzer import gerar_graficos_comparativos, salvar_resultados_csv
+from historico_resultados import registrar_execucao, obter_versoes_bancos
 
 
 # =============================================================================================================
 # 🔹Função genérica de execução com coleta de métricas
 # =============================================================================================================
 def executar_benchmark_operacao(tipo, func_pg, func_mongo, conn_pg, cursor_pg, db_mongo, dados, logger,
-    total_ops=1000):
+    total_ops=1000, pasta_perfis=None, modo_perfil="tempo"):
     logger.info(f"\n Executando operação {tipo}...")
 
-    monitor = ResourceMonitor()
-    monitor.start()
-
-    # PostgreSQL
-    t_pg = func_pg(cursor_pg, conn_pg, logger) if func_pg else 0
-    # MongoDB
-    t_mongo = func_mongo(db_mongo, logger) if func_mongo else 0
-
-    monitor.stop()
-    recursos = monitor.get_stats()
-
-    throughput_pg = total_ops / (t_pg / 1000) if t_pg > 0 else 0
-    throughput_mongo = total_ops / (t_mongo / 1000) if t_mongo > 0 else 0
-
-    resultado = {
-        "operacao": tipo,
-        "tempo_pg_ms": round(t_pg, 2),
-        "tempo_mongo_ms": round(t_mongo, 2),
-        "throughput_pg_ops_s": round(throughput_pg, 2),
-        "throughput_mongo_ops_s": round(throughput_mongo, 2),
-        "cpu_media_%": round(recursos["cpu_avg"], 2),
-        "memoria_media_MB": round(recursos["mem_avg"], 2),
-        "tam_pg_MB": tamanho_postgres(conn_pg),
-        "tam_mongo_MB": tamanho_mongo(db_mongo),
-    }
+    with span(tipo, operacao=tipo):
+        monitor = ResourceMonitor()
+        monitor.start()
+
+        # PostgreSQL
+        with span(f"{tipo} postgresql", banco="postgresql", operacao=tipo), \
+                perfilar(f"{tipo}_postgres", pasta_perfis, logger, modo_perfil) as perfil_pg:
+            t_pg = func_pg(cursor_pg, conn_pg, logger) if func_pg else 0
+        # MongoDB
+        with span(f"{tipo} mongodb", banco="mongodb", operacao=tipo), \
+                perfilar(f"{tipo}_mongo", pasta_perfis, logger, modo_perfil) as perfil_mongo:
+            t_mongo = func_mongo(db_mongo, logger) if func_mongo else 0
+
+        monitor.stop()
+        recursos = monitor.get_stats()
+
+        throughput_pg = total_ops / (t_pg / 1000) if t_pg > 0 else 0
+        throughput_mongo = total_ops / (t_mongo / 1000) if t_mongo > 0 else 0
+
+        with span("tamanho das bases", operacao=tipo):
+            resultado = {
+                "operacao": tipo,
+                "tempo_pg_ms": round(t_pg, 2),
+                "tempo_mongo_ms": round(t_mongo, 2),
+                "throughput_pg_ops_s": round(throughput_pg, 2),
+                "throughput_mongo_ops_s": round(throughput_mongo, 2),
+                "cpu_media_%": round(recursos["cpu_avg"], 2),
+                "memoria_media_MB": round(recursos["mem_avg"], 2),
+                "tam_pg_MB": tamanho_postgres(conn_pg),
+                "tam_mongo_MB": tamanho_mongo(db_mongo),
+                **colunas_perfil(perfil_pg, "pg"),
+                **colunas_perfil(perfil_mongo, "mongo"),
+            }
 
     logger.info(f"Operação {tipo} concluída.")
     return resultado
@@ -54,92 +66,120 @@ def executar_benchmark_operacao(tipo, func_pg, func_mongo, conn_pg, cursor_pg, d
 # =============================================================================================================
 # 🔹Benchmark completo
 # =============================================================================================================
-def executar_benchmark_completo():
+def executar_benchmark_completo(rotulo=None, qtd_clientes=100, qtd_produtos=50, qtd_pedidos=40, qtd_categorias=5,
+    perfil=None):
     logger = configurar_logger()
+    tracer = configurar_tracer()
     logger.info("=" * 70)
     logger.info("INICIANDO BENCHMARK COMPLETO - PostgreSQL x MongoDB")
     logger.info("=" * 70)
 
-    # Conexões
-    conn_pg, cursor_pg = conectar_postgres(logger)
-    client_mongo, db_mongo = conectar_mongo(logger)
-
-    # Limpeza inicial
-    limpar_tabelas(cursor_pg, conn_pg, logger)
-    limpar_colecoes(db_mongo, logger)
-
-    # Geração de dataset simulado
-    logger.info("Gerando dataset simulado...")
-    dados = gerar_dados_simulados(
-        qtd_clientes=100,
-        qtd_produtos=50,
-        qtd_pedidos=40,
-        qtd_categorias=5,
-    )
-
-    resultados = []
-
-    # 1️)INSERT
-    resultados.append(
-        executar_benchmark_operacao(
-            "INSERT",
-            lambda c, conn, log: inserir_dados_postgres(c, conn, log, dados),
-            lambda db, log: inserir_dados_mongo(db, dados, log),
-            conn_pg, cursor_pg, db_mongo, dados, logger
-        )
-    )
-
-    # 2️)Sincronização PostgreSQL → MongoDB
-    logger.info("Sincronizando dados PostgreSQL → MongoDB...")
-    sincronizar_para_mongo(cursor_pg, db_mongo, logger)
-
-    # 3️)SELECT
-    resultados.append(
-        executar_benchmark_operacao(
-            "SELECT",
-            selecionar_dados_postgres,
-            selecionar_dados_mongo,
-            conn_pg, cursor_pg, db_mongo, dados, logger
+    tamanho_dataset = {
+        "qtd_clientes": qtd_clientes,
+        "qtd_produtos": qtd_produtos,
+        "qtd_pedidos": qtd_pedidos,
+        "qtd_categorias": qtd_categorias,
+    }
+
+    with span("benchmark", rotulo=rotulo, perfil=perfil, **tamanho_dataset) as span_execucao:
+        # Conexões
+        with span("conexao"):
+            with span("conexao postgresql", banco="postgresql"):
+                conn_pg, cursor_pg = conectar_postgres(logger)
+            with span("conexao mongodb", banco="mongodb"):
+                client_mongo, db_mongo = conectar_mongo(logger)
+
+        # Limpeza inicial
+        with span("limpeza"):
+            with span("limpeza postgresql", banco="postgresql"):
+                limpar_tabelas(cursor_pg, conn_pg, logger)
+            with span("limpeza mongodb", banco="mongodb"):
+                limpar_colecoes(db_mongo, logger)
+
+        # Perfilamento opcional: os perfis ficam em logs/perfis/<data-hora>/
+        pasta_perfis = os.path.join(PASTA_PERFIS, datetime.now().strftime("%Y%m%d-%H%M%S")) if perfil else None
+
+        # Geração de dataset simulado
+        logger.info("Gerando dataset simulado...")
+        with span("geracao") as span_geracao, perfilar("GERACAO", pasta_perfis, logger, perfil):
+            dados = gerar_dados_simulados(**tamanho_dataset)
+            span_geracao.set_atributo("linhas", sum(len(v) for v in dados.values()))
+
+        resultados = []
+
+        # 1️)INSERT
+        resultados.append(
+            executar_benchmark_operacao(
+                "INSERT",
+                lambda c, conn, log: inserir_dados_postgres(c, conn, log, dados),
+                lambda db, log: inserir_dados_mongo(db, dados, log),
+                conn_pg, cursor_pg, db_mongo, dados, logger, pasta_perfis=pasta_perfis,
+                modo_perfil=perfil
+            )
         )
-    )
-
-    # 4️)UPDATE
-    resultados.append(
-        executar_benchmark_operacao(
-            "UPDATE",
-            atualizar_dados_postgres,
-            atualizar_dados_mongo,
-            conn_pg, cursor_pg, db_mongo, dados, logger
+
+        # 2️)Sincronização PostgreSQL → MongoDB
+        logger.info("Sincronizando dados PostgreSQL → MongoDB...")
+        with span("sincronizacao", banco="postgresql→mongodb"), \
+                perfilar("SINCRONIZACAO", pasta_perfis, logger, perfil):
+            sincronizar_para_mongo(cursor_pg, db_mongo, logger)
+
+        # 3️)SELECT
+        resultados.append(
+            executar_benchmark_operacao(
+                "SELECT",
+                selecionar_dados_postgres,
+                selecionar_dados_mongo,
+                conn_pg, cursor_pg, db_mongo, dados, logger, pasta_perfis=pasta_perfis,
+                modo_perfil=perfil
+            )
         )
-    )
-
-    # 5️)DELETE
-    resultados.append(
-        executar_benchmark_operacao(
-            "DELETE",
-            deletar_dados_postgres,
-            deletar_dados_mongo,
-            conn_pg, cursor_pg, db_mongo, dados, logger
+
+        # 4️)UPDATE
+        resultados.append(
+            executar_benchmark_operacao(
+                "UPDATE",
+                atualizar_dados_postgres,
+                atualizar_dados_mongo,
+                conn_pg, cursor_pg, db_mongo, dados, logger, pasta_perfis=pasta_perfis,
+                modo_perfil=perfil
+            )
         )
-    )
 
-    # Salvando resultados
-    os.makedirs("logs", exist_ok=True)
-    arquivo_csv = "logs/resultados_crud.csv"
-    with open(arquivo_csv, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=resultados[0].keys())
-        writer.writeheader()
-        writer.writerows(resultados)
-    logger.info(f"Resultados salvos em {arquivo_csv}")
+        # 5️)DELETE
+        resultados.append(
+            executar_benchmark_operacao(
+                "DELETE",
+                deletar_dados_postgres,
+                deletar_dados_mongo,
+                conn_pg, cursor_pg, db_mongo, dados, logger, pasta_perfis=pasta_perfis,
+                modo_perfil=perfil
+            )
+        )
 
-    # Geração de gráficos comparativos
-    gerar_graficos_comparativos(resultados)
-    logger.info("Gráficos de desempenho gerados com sucesso em /logs/graficos/")
+        with span("relatorio"):
+            # Salvando resultados (CSV da última execução + histórico com todas as execuções)
+            salvar_resultados_csv(resultados)
+            run_id = registrar_execucao(
+                resultados,
+                tamanho_dataset=tamanho_dataset,
+                configuracao={"total_ops": 1000, "perfil": perfil, "trace_id": tracer.trace_id,
+                              "bancos": obter_versoes_bancos(conn_pg, db_mongo)},
+                rotulo=rotulo,
+            )
+            span_execucao.set_atributo("run_id", run_id)
+            logger.info(f"Execução registrada no histórico com run_id {run_id}")
+
+            # Geração de gráficos comparativos
+            gerar_graficos_comparativos(resultados)
+            logger.info("Gráficos de desempenho gerados com sucesso em /logs/graficos/")
 
     logger.info("=" * 70)
     logger.info("BENCHMARK FINALIZADO COM SUCESSO!")
+    logger.info(f"Spans da execução (trace {tracer.trace_id}) salvos em {tracer.arquivo}")
     logger.info("=" * 70)
 
+    encerrar_tracer()
     client_mongo.close()
     cursor_pg.close()
     conn_pg.close()
@@ -149,4 +189,10 @@ def executar_benchmark_completo():
 # 🔹Ponto de entrada principal
 # =============================================================================================================
 if __name__ == "__main__":
-    executar_benchmark_completo()
+    parser = argparse.ArgumentParser(description="Benchmark CRUD PostgreSQL x MongoDB.")
+    parser.add_argument("--rotulo", help="rótulo da execução no histórico (ex.: pg16-mongo7)")
+    parser.add_argument("--perfil", nargs="?", const="tempo", choices=MODOS_PERFIL,
+                        help="perfila cada operação em um modo: tempo (CPU cliente x espera do servidor, padrão), "
+                             "cprofile (.prof e top de funções) ou memoria (pico de alocações do tracemalloc)")
+    args = parser.parse_args()
+    executar_benchmark_completo(rotulo=args.rotulo, perfil=args.perfil)
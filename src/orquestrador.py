@@ -0,0 +1,362 @@
+"""
+Orquestrador multiprocesso da carga OLTP mista: PostgreSQL x MongoDB
+Executa o gerador de dados, os clientes de carga e o amostrador de recursos em processos separados, cada um
+fixado em um conjunto de CPUs configurável, para que o GIL e a thread do ResourceMonitor não disputem o mesmo
+interpretador com os drivers. Os clientes recebem os novos pedidos do gerador por uma fila e devolvem suas
+janelas por pipe; ao final, o orquestrador informa a saturação de CPU do lado cliente para mostrar se o
+gerador de carga (e não o banco) é o fator limitante em alta concorrência.
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from statistics import mean
+import psutil
+from db_postgres import *
+from db_mongo import *
+from data_generator import gerar_dados_simulados
+from benchmark_soak import MIX_PADRAO, converter_duracao, montar_operacoes, executar_carga_mista
+from utilitarios import percentil_histograma
+from logger_config import configurar_logger
+from tracing import configurar_tracer, encerrar_tracer, span
+from performance_analyzer import gerar_graficos_orquestrador, salvar_resultados_csv
+
+ARQUIVO_CSV_ORQUESTRADOR = "logs/resultados_orquestrador.csv"
+LIMIAR_SATURACAO = 90.0  # % de CPU a partir do qual o cliente é considerado saturado
+
+
+# =============================================================================================================
+# 🔹Conjuntos de CPUs ("0-3,6") e afinidade
+# =============================================================================================================
+def converter_cpus(texto):
+    cpus = set()
+    for parte in str(texto).split(","):
+        inicio, _, fim = parte.strip().partition("-")
+        cpus.update(range(int(inicio), int(fim or inicio) + 1))
+    return sorted(cpus)
+
+
+def cpus_disponiveis():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpus_padrao():
+    """Reserva a 1ª CPU para o gerador, a 2ª para o amostrador e as demais para os clientes."""
+    cpus = cpus_disponiveis()
+    if len(cpus) < 3:
+        return {"gerador": cpus, "amostrador": cpus, "clientes": cpus}
+    return {"gerador": cpus[:1], "amostrador": cpus[1:2], "clientes": cpus[2:]}
+
+
+def fixar_cpus(cpus, logger=None):
+    """Fixa o processo atual nas CPUs indicadas (sched_setaffinity no Linux; psutil nas demais plataformas)."""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        else:
+            psutil.Process().cpu_affinity(list(cpus))
+        return True
+    except (AttributeError, OSError, ValueError) as e:
+        if logger:
+            logger.warning(f"Não foi possível fixar o processo nas CPUs {list(cpus)}: {e}")
+        return False
+
+
+# =============================================================================================================
+# 🔹Processo gerador: carga inicial e fluxo contínuo de novos pedidos
+# =============================================================================================================
+def recarregar_bases(dados, logger):
+    """Restaura as duas bases exatamente ao dataset inicial (mesmos ids, status e tamanhos de tabela)."""
+    conn_pg, cursor_pg = conectar_postgres(logger)
+    client_mongo, db_mongo = conectar_mongo(logger)
+    limpar_tabelas(cursor_pg, conn_pg, logger)
+    inserir_dados_postgres(cursor_pg, conn_pg, logger, dados)
+    sincronizar_para_mongo(cursor_pg, db_mongo, logger)
+    db_mongo.pedidos.create_index("_id_pg", unique=True)
+    cursor_pg.close()
+    conn_pg.close()
+    client_mongo.close()
+
+
+def _esvaziar_fila(fila, espera=0.2):
+    # Descarta os pedidos que sobraram na fila; a espera cobre os que ainda estão no buffer da thread alimentadora.
+    descartados = 0
+    while True:
+        try:
+            fila.get(timeout=espera)
+            descartados += 1
+        except queue.Empty:
+            return descartados
+
+
+def processo_gerador(cpus, tamanhos, fila, parar, conexao):
+    """
+    Carrega as bases com o dataset simulado, envia o dataset pelo pipe e passa a produzir novos pedidos na fila
+    (com ids únicos para o MongoDB) até o evento `parar`. A cada "recarregar" recebido pelo pipe, restaura as
+    bases ao dataset inicial, descarta os pedidos pendentes, volta a numerar a partir do maior id do dataset e
+    responde "pronto" — assim as inserções de cada rodada continuam a faixa de ids que os clientes sorteiam.
+    """
+    logger = configurar_logger()
+    fixar_cpus(cpus, logger)
+    dados = gerar_dados_simulados(qtd_categorias=5, **tamanhos)
+    recarregar_bases(dados, logger)
+    conexao.send(dados)
+
+    gerador = random.Random(11)
+    ids_clientes = [c["id_cliente"] for c in dados["clientes"]]
+    produtos = dados["produtos"]
+    primeiro_id = max(p["id_pedido"] for p in dados["pedidos"]) + 1
+    proximo_id = primeiro_id
+    pedido = None
+    while not parar.is_set():
+        if conexao.poll():
+            conexao.recv()
+            recarregar_bases(dados, logger)
+            descartados = _esvaziar_fila(fila)
+            logger.debug(f"{descartados} pedido(s) da rodada anterior descartado(s) da fila.")
+            proximo_id, pedido = primeiro_id, None
+            conexao.send("pronto")
+        if pedido is None:
+            pedido = {
+                "id_pedido": proximo_id,
+                "cliente_id": gerador.choice(ids_clientes),
+                "itens": [{"produto_id": p["id_produto"], "quantidade": gerador.randint(1, 3),
+                           "preco_unitario": p["preco"]} for p in gerador.sample(produtos, k=gerador.randint(1, 3))],
+            }
+            proximo_id += 1
+        try:
+            fila.put(pedido, timeout=0.1)
+            pedido = None
+        except queue.Full:
+            continue
+    fila.cancel_join_thread()
+    conexao.close()
+
+
+# =============================================================================================================
+# 🔹Processo cliente: carga mista sem monitor no mesmo interpretador
+# =============================================================================================================
+def processo_cliente(indice, banco, cpus, dados, fila, duracao_s, mix, barreira, conexao):
+    """
+    Executa a carga mista e devolve as janelas, o histograma de latências (somável entre clientes) e o uso de
+    CPU do próprio processo (tempo de CPU / parede).
+    """
+    logger = configurar_logger()
+    try:
+        fixar_cpus(cpus, logger)
+        if banco == "PostgreSQL":
+            conn, cursor = conectar_postgres(logger)
+            alvo = (cursor, conn)
+        else:
+            client, alvo = conectar_mongo(logger)
+        operacoes = montar_operacoes(banco, alvo, dados, random.Random(indice), fila_pedidos=fila)
+        barreira.wait(timeout=120)
+
+        histograma = Counter()
+        cpu_inicio, inicio = time.process_time(), time.monotonic()
+        janelas = executar_carga_mista(banco, operacoes, duracao_s, mix, logger, semente=indice, monitorar=False,
+                                       histograma=histograma)
+        parede = time.monotonic() - inicio
+        conexao.send({
+            "indice": indice,
+            "janelas": janelas,
+            "histograma": dict(histograma),
+            "cpu_cliente_%": (time.process_time() - cpu_inicio) / parede * 100 if parede > 0 else 0,
+        })
+        if banco == "PostgreSQL":
+            cursor.close()
+            conn.close()
+        else:
+            client.close()
+    except Exception as e:
+        barreira.abort()
+        conexao.send({"indice": indice, "erro": repr(e)})
+    finally:
+        conexao.close()
+
+
+# =============================================================================================================
+# 🔹Processo amostrador: CPU por núcleo, fora dos núcleos dos clientes
+# =============================================================================================================
+def processo_amostrador(cpus, nucleos, intervalo, barreira, parar, conexao):
+    """Amostra o uso (%) de cada CPU em `nucleos` a cada `intervalo` segundos, da largada até o evento `parar`."""
+    fixar_cpus(cpus)
+    amostras = []
+    try:
+        barreira.wait(timeout=120)
+    except threading.BrokenBarrierError:
+        parar.wait()
+    psutil.cpu_percent(percpu=True)  # a primeira leitura só define a referência
+    while not parar.wait(intervalo):
+        por_cpu = psutil.cpu_percent(percpu=True)
+        amostras.append([por_cpu[n] for n in nucleos if n < len(por_cpu)])
+    conexao.send(amostras)
+    conexao.close()
+
+
+# =============================================================================================================
+# 🔹Uma rodada: N clientes contra um banco
+# =============================================================================================================
+def executar_rodada(contexto, banco, qtd_clientes, cpus, dados, fila, duracao_s, mix, logger,
+    intervalo_amostragem=0.5, limiar=LIMIAR_SATURACAO):
+    # Clientes, amostrador e orquestrador partem juntos da mesma barreira
+    barreira = contexto.Barrier(qtd_clientes + 2)
+    parar_amostrador = contexto.Event()
+    leitura_amostrador, escrita_amostrador = contexto.Pipe(duplex=False)
+    amostrador = contexto.Process(target=processo_amostrador, name="amostrador",
+                                  args=(cpus["amostrador"], cpus["clientes"], intervalo_amostragem, barreira,
+                                        parar_amostrador, escrita_amostrador))
+    amostrador.start()
+    escrita_amostrador.close()
+
+    clientes, pipes = [], []
+    for indice in range(qtd_clientes):
+        # Cada cliente fica em um núcleo próprio (rodízio quando há mais clientes que núcleos)
+        nucleo = [cpus["clientes"][indice % len(cpus["clientes"])]]
+        leitura, escrita = contexto.Pipe(duplex=False)
+        processo = contexto.Process(target=processo_cliente, name=f"cliente-{indice}",
+                                    args=(indice, banco, nucleo, dados, fila, duracao_s, mix, barreira, escrita))
+        processo.start()
+        escrita.close()
+        clientes.append(processo)
+        pipes.append(leitura)
+
+    try:
+        barreira.wait(timeout=120)
+    except threading.BrokenBarrierError:
+        logger.error(f"{banco}: um cliente falhou antes do início da carga.")
+    respostas = [p.recv() for p in pipes]
+    for processo in clientes:
+        processo.join()
+    parar_amostrador.set()
+    amostras = leitura_amostrador.recv()
+    amostrador.join()
+
+    falhas = [r for r in respostas if "erro" in r]
+    for r in falhas:
+        logger.error(f"{banco}: cliente {r['indice']} falhou: {r['erro']}")
+    respostas = [r for r in respostas if "erro" not in r]
+    janelas = [j for r in respostas for j in r["janelas"]]
+    if not janelas:
+        return None
+
+    operacoes = sum(j["operacoes"] for j in janelas)
+    # Percentis da rodada inteira: os histogramas dos clientes são somados antes do cálculo
+    histograma = sum((Counter(r["histograma"]) for r in respostas), Counter())
+    cpu_clientes = [r["cpu_cliente_%"] for r in respostas]
+    nucleos = [mean(a) for a in amostras if a]
+    cpu_nucleos = mean(nucleos) if nucleos else 0
+    if not nucleos:
+        logger.warning(f"{banco} com {qtd_clientes} cliente(s): o amostrador não registrou amostras de CPU.")
+    return {
+        "banco": banco,
+        "clientes": qtd_clientes,
+        "operacoes": operacoes,
+        "throughput_ops_s": round(operacoes / duracao_s, 2),
+        "latencia_p50_ms": round(percentil_histograma(histograma, 50), 3),
+        "latencia_p99_ms": round(percentil_histograma(histograma, 99), 3),
+        "erros": sum(j["erros"] for j in janelas) + len(falhas),
+        "cpu_cliente_media_%": round(mean(cpu_clientes), 2),
+        "cpu_cliente_max_%": round(max(cpu_clientes), 2),
+        "cpu_nucleos_clientes_%": round(cpu_nucleos, 2),
+        "cliente_saturado": max(cpu_clientes) >= limiar or cpu_nucleos >= limiar,
+    }
+
+
+# =============================================================================================================
+# 🔹Orquestração completa
+# =============================================================================================================
+def executar_orquestrador(clientes=(1, 2, 4, 8), duracao="30s", bancos=("PostgreSQL", "MongoDB"), mix=None,
+    cpus=None, qtd_clientes=1000, qtd_produtos=500, qtd_pedidos=5000, limiar=LIMIAR_SATURACAO):
+    duracao_s = converter_duracao(duracao)
+    mix = mix or MIX_PADRAO
+    cpus = {**cpus_padrao(), **(cpus or {})}
+    logger = configurar_logger()
+    configurar_tracer()
+    logger.info("=" * 70)
+    logger.info(f"INICIANDO ORQUESTRADOR MULTIPROCESSO ({duracao_s:.0f}s por rodada, clientes {list(clientes)})")
+    logger.info(f"CPUs — gerador: {cpus['gerador']}, amostrador: {cpus['amostrador']}, clientes: {cpus['clientes']}")
+    logger.info("=" * 70)
+    if set(cpus["clientes"]) & (set(cpus["gerador"]) | set(cpus["amostrador"])):
+        logger.warning("As CPUs dos clientes se sobrepõem às do gerador/amostrador; as medições podem ser afetadas.")
+
+    # O orquestrador só coordena: fica fora dos núcleos dos clientes
+    fixar_cpus(cpus["amostrador"], logger)
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue(maxsize=1000)
+    parar_gerador = contexto.Event()
+    comandos, conexao_gerador = contexto.Pipe()
+    tamanhos = {"qtd_clientes": qtd_clientes, "qtd_produtos": qtd_produtos, "qtd_pedidos": qtd_pedidos}
+    gerador = contexto.Process(target=processo_gerador, name="gerador",
+                               args=(cpus["gerador"], tamanhos, fila, parar_gerador, conexao_gerador))
+    with span("reset"):
+        gerador.start()
+        conexao_gerador.close()
+        dados = comandos.recv()
+
+    resultados = []
+    primeira_rodada = True
+    for banco in bancos:
+        for qtd in clientes:
+            # Cada rodada parte do mesmo dataset: sem isso, as inserções e trocas de status das rodadas
+            # anteriores fariam o throughput por quantidade de clientes se confundir com o crescimento das tabelas
+            if not primeira_rodada:
+                with span("reset", banco=banco.lower(), clientes=qtd):
+                    comandos.send("recarregar")
+                    comandos.recv()
+            primeira_rodada = False
+            with span(f"orquestrador {banco.lower()}", banco=banco.lower(), clientes=qtd, duracao_s=duracao_s) as s:
+                linha = executar_rodada(contexto, banco, qtd, cpus, dados, fila, duracao_s, mix, logger,
+                                        limiar=limiar)
+                s.set_atributo("linhas", linha["operacoes"] if linha else 0)
+            if linha is None:
+                logger.warning(f"{banco} com {qtd} cliente(s): nenhuma janela recebida; rodada descartada.")
+                continue
+            resultados.append(linha)
+            logger.info(f"{banco} com {qtd} cliente(s): {linha['throughput_ops_s']} ops/s, p99 "
+                        f"{linha['latencia_p99_ms']} ms, CPU do cliente {linha['cpu_cliente_max_%']}% (máx.), "
+                        f"núcleos dos clientes {linha['cpu_nucleos_clientes_%']}%.")
+            if linha["cliente_saturado"]:
+                logger.warning(f"{banco} com {qtd} cliente(s): lado cliente saturado — o throughput medido pode "
+                               "estar limitado pelo gerador de carga, não pelo banco.")
+
+    parar_gerador.set()
+    gerador.join()
+
+    salvar_resultados_csv(resultados, ARQUIVO_CSV_ORQUESTRADOR)
+
+    gerar_graficos_orquestrador(resultados, limiar)
+    logger.info("Gráficos do orquestrador gerados em /logs/graficos/")
+
+    logger.info("=" * 70)
+    logger.info("ORQUESTRADOR FINALIZADO!")
+    logger.info("=" * 70)
+    encerrar_tracer()
+    return resultados
+
+
+# =============================================================================================================
+# 🔹Ponto de entrada principal
+# =============================================================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga OLTP mista com clientes em processos e CPUs isolados.")
+    parser.add_argument("--clientes", nargs="+", type=int, default=[1, 2, 4, 8],
+                        help="quantidades de processos clientes avaliadas")
+    parser.add_argument("--duracao", default="30s", help="duração de cada rodada: segundos ou 30s, 15m, 2h")
+    parser.add_argument("--bancos", nargs="+", choices=["PostgreSQL", "MongoDB"], default=["PostgreSQL", "MongoDB"])
+    parser.add_argument("--cpus-gerador", type=converter_cpus, help='CPUs do gerador, ex.: "0"')
+    parser.add_argument("--cpus-amostrador", type=converter_cpus, help='CPUs do amostrador, ex.: "1"')
+    parser.add_argument("--cpus-clientes", type=converter_cpus, help='CPUs dos clientes, ex.: "2-7"')
+    parser.add_argument("--limiar", type=float, default=LIMIAR_SATURACAO, help="CPU (%%) considerada saturada")
+    parser.add_argument("--pedidos", type=int, default=5000, help="quantidade de pedidos gerados")
+    args = parser.parse_args()
+    cpus = {"gerador": args.cpus_gerador, "amostrador": args.cpus_amostrador, "clientes": args.cpus_clientes}
+    executar_orquestrador(args.clientes, args.duracao, args.bancos,
+                          cpus={k: v for k, v in cpus.items() if v}, qtd_pedidos=args.pedidos, limiar=args.limiar)
@@ -1,20 +1,37 @@
 """
 Módulo de análise de desempenho e geração de gráficos comparativos.
 Registra tempos de execução em CSV e cria gráficos de médias por etapa.
+
+O relatório é montado em um único pipeline: os resultados são carregados uma vez, todas as agregações
+são calculadas em uma passada vetorizada e os gráficos são renderizados em paralelo (backend Agg), pulando
+os que já existem e cujos dados de entrada não mudaram desde a última execução.
 """
 
+import argparse
 import csv
+import glob
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import matplotlib
 matplotlib.use("Agg")  # Modo sem interface gráfica
 import matplotlib.pyplot as plt
-from datetime import datetime
-from statistics import mean, stdev
+from historico_resultados import carregar_resultados_historico
 
 # Caminhos padrão
 PASTA_GRAFICOS = "logs/graficos"
 ARQUIVO_CSV = "logs/resultados_crud.csv"
+ARQUIVO_CACHE = f"{PASTA_GRAFICOS}/.cache_graficos.json"
+
+# Métricas numéricas agregadas por operação
+METRICAS = [
+    "tempo_pg_ms", "tempo_mongo_ms", "throughput_pg_ops_s", "throughput_mongo_ops_s",
+    "cpu_media_%", "memoria_media_MB", "tam_pg_MB", "tam_mongo_MB",
+]
+# Incrementar quando o desenho de algum gráfico mudar, para invalidar o cache
+VERSAO_GRAFICOS = 1
 
 
 # =============================================================================================================
@@ -31,129 +48,535 @@ def salvar_resultados_csv(resultados, arquivo=ARQUIVO_CSV):
 
 
 # =============================================================================================================
-# 🔹 Função: gerar_graficos_comparativos
+# 🔹 Etapa 1: carga única dos resultados
 # =============================================================================================================
-def gerar_graficos_comparativos(resultados):
-    # Gera gráficos comparativos de tempo, throughput, CPU, memória e tamanho das bases.
-    os.makedirs(PASTA_GRAFICOS, exist_ok=True)  # Criação da pasta de saída
-    df = pd.DataFrame(resultados)
+def carregar_resultados(origem=ARQUIVO_CSV):
+    """
+    Carrega os resultados em um DataFrame. `origem` pode ser uma lista de dicionários, um DataFrame, um
+    caminho/padrão glob de CSV ou uma lista de caminhos (várias execuções são concatenadas). Execuções
+    registradas no histórico são lidas com `carregar_resultados_historico` e passadas como lista de dicionários.
+    """
+    if isinstance(origem, pd.DataFrame):
+        return origem
+    if isinstance(origem, list) and (not origem or isinstance(origem[0], dict)):
+        return pd.DataFrame(origem)
+
+    padroes = [origem] if isinstance(origem, str) else list(origem)
+    arquivos = sorted({a for p in padroes for a in glob.glob(p)})
+    if not arquivos:
+        return pd.DataFrame(columns=["operacao"] + METRICAS)
+    return pd.concat([pd.read_csv(a) for a in arquivos], ignore_index=True)
+
 
-    # ========================================================================================================
-    # Gráfico 1: Tempo médio por operação
-    # ========================================================================================================
+# =============================================================================================================
+# 🔹 Etapa 2: agregações em uma única passada vetorizada
+# =============================================================================================================
+def calcular_agregados(df):
+    """Calcula média e desvio padrão de todas as métricas por operação, além das médias gerais."""
+    metricas = [m for m in METRICAS if m in df.columns]
+    por_operacao = df.groupby("operacao", sort=False)[metricas].agg(["mean", "std"])
+    return {
+        "operacoes": list(por_operacao.index),
+        "execucoes": int(df.groupby("operacao", sort=False).size().max()) if len(df) else 0,
+        "media": por_operacao.xs("mean", axis=1, level=1).round(2),
+        "desvio": por_operacao.xs("std", axis=1, level=1).fillna(0).round(2),
+        "geral": df[metricas].mean(),
+    }
+
+
+# =============================================================================================================
+# 🔹 Etapa 3: funções de desenho (executadas nos processos de renderização)
+# =============================================================================================================
+def _desenhar_barras(dados, caminho):
+    # Barras lado a lado PostgreSQL x MongoDB, com desvio padrão quando há mais de uma execução.
     plt.figure(figsize=(8, 5))
     bar_width = 0.35
-    x = range(len(df["operacao"]))
-    plt.bar([p - bar_width / 2 for p in x], df["tempo_pg_ms"], bar_width, label="PostgreSQL", alpha=0.8)
-    plt.bar([p + bar_width / 2 for p in x], df["tempo_mongo_ms"], bar_width, label="MongoDB", alpha=0.8)
-    plt.xticks(x, df["operacao"])
-    plt.ylabel("Tempo médio (ms)")
-    plt.title("Comparativo de tempo por tipo de operação")
+    x = range(len(dados["operacoes"]))
+    plt.bar([p - bar_width / 2 for p in x], dados["pg"], bar_width, yerr=dados["pg_desvio"], label="PostgreSQL",
+            alpha=0.8)
+    plt.bar([p + bar_width / 2 for p in x], dados["mongo"], bar_width, yerr=dados["mongo_desvio"], label="MongoDB",
+            alpha=0.8)
+    plt.xticks(x, dados["operacoes"])
+    plt.ylabel(dados["ylabel"])
+    plt.title(dados["titulo"])
     plt.legend()
     plt.grid(True, axis="y", linestyle="--", alpha=0.5)
     plt.tight_layout()
-    plt.savefig(f"{PASTA_GRAFICOS}/tempo_por_operacao.png")
+    plt.savefig(caminho)
     plt.close()
 
-    # ========================================================================================================
-    # Gráfico 2: Throughput por operação
-    # ========================================================================================================
-    plt.figure(figsize=(8, 5))
-    plt.bar([p - bar_width / 2 for p in x], df["throughput_pg_ops_s"], bar_width, label="PostgreSQL", alpha=0.8)
-    plt.bar([p + bar_width / 2 for p in x], df["throughput_mongo_ops_s"], bar_width, label="MongoDB", alpha=0.8)
-    plt.xticks(x, df["operacao"])
-    plt.ylabel("Throughput (operações/segundo)")
-    plt.title("Comparativo de throughput por tipo de operação")
-    plt.legend()
-    plt.grid(True, axis="y", linestyle="--", alpha=0.5)
-    plt.tight_layout()
-    plt.savefig(f"{PASTA_GRAFICOS}/throughput_por_operacao.png")
-    plt.close()
 
-    # =======================================================================================================
-    # Gráfico 3: Uso médio de CPU e memória
-    # =======================================================================================================
+def _desenhar_linhas(dados, caminho):
+    # Uma linha por série ao longo das operações.
     plt.figure(figsize=(8, 5))
-    plt.plot(df["operacao"], df["cpu_media_%"], marker="o", label="CPU (%)")
-    plt.plot(df["operacao"], df["memoria_media_MB"], marker="s", label="Memória (MB)")
-    plt.title("Uso médio de CPU e memória por operação")
+    for serie in dados["series"]:
+        plt.plot(dados["operacoes"], serie["valores"], marker=serie["marcador"], label=serie["rotulo"])
+    plt.title(dados["titulo"])
     plt.xlabel("Operação")
-    plt.ylabel("Uso médio")
+    plt.ylabel(dados["ylabel"])
     plt.legend()
     plt.grid(True, linestyle="--", alpha=0.6)
     plt.tight_layout()
-    plt.savefig(f"{PASTA_GRAFICOS}/cpu_memoria_por_operacao.png")
+    plt.savefig(caminho)
     plt.close()
 
-    # =======================================================================================================
-    # Gráfico 4: Tamanho das bases
-    # =======================================================================================================
-    plt.figure(figsize=(8, 5))
-    plt.plot(df["operacao"], df["tam_pg_MB"], label="PostgreSQL (MB)", marker="o")
-    plt.plot(df["operacao"], df["tam_mongo_MB"], label="MongoDB (MB)", marker="s")
-    plt.title("Tamanho das bases de dados após cada operação")
-    plt.xlabel("Operação")
-    plt.ylabel("Tamanho (MB)")
+
+def _desenhar_transacoes(dados, caminho):
+    # Latência por COMMIT x throughput para cada tamanho de transação e banco.
+    fig, eixos = plt.subplots(1, 2, figsize=(12, 5))
+    for eixo, operacao in zip(eixos, ["UPDATE", "DELETE"]):
+        for banco, marcador in [("PostgreSQL", "o"), ("MongoDB", "s")]:
+            pontos = dados[operacao][banco]
+            eixo.plot(pontos["latencia"], pontos["throughput"], marker=marcador, label=banco)
+            for rotulo, lat, thr in zip(pontos["tamanhos"], pontos["latencia"], pontos["throughput"]):
+                eixo.annotate(rotulo, (lat, thr), textcoords="offset points", xytext=(5, 5), fontsize=8)
+        eixo.set_xscale("log")
+        eixo.set_title(f"{operacao}: latência por transação x throughput")
+        eixo.set_xlabel("Latência média por COMMIT (ms, escala log)")
+        eixo.set_ylabel("Throughput (linhas/segundo)")
+        eixo.legend()
+        eixo.grid(True, linestyle="--", alpha=0.5)
+    fig.tight_layout()
+    fig.savefig(caminho)
+    plt.close(fig)
+
+
+def _desenhar_leitura(dados, caminho):
+    # Linhas/s e pico de memória do cliente para cada estratégia de leitura.
+    fig, (eixo_vazao, eixo_memoria) = plt.subplots(1, 2, figsize=(13, 5))
+    x = range(len(dados["rotulos"]))
+    cores = ["tab:blue" if b == "PostgreSQL" else "tab:green" for b in dados["bancos"]]
+    eixo_vazao.bar(x, dados["linhas_s"], color=cores, alpha=0.8)
+    eixo_vazao.set_ylabel("Linhas/segundo")
+    eixo_vazao.set_title("Vazão de leitura por estratégia")
+    bar_width = 0.4
+    eixo_memoria.bar([p - bar_width / 2 for p in x], dados["pico_rss"], bar_width, label="Pico RSS (MB)", alpha=0.8)
+    eixo_memoria.bar([p + bar_width / 2 for p in x], dados["pico_python"], bar_width, label="Pico alocações Python (MB)",
+                     alpha=0.8)
+    eixo_memoria.set_ylabel("Memória do cliente (MB)")
+    eixo_memoria.set_title("Pico de memória do cliente por estratégia")
+    eixo_memoria.legend()
+    for eixo in (eixo_vazao, eixo_memoria):
+        eixo.set_xticks(list(x))
+        eixo.set_xticklabels(dados["rotulos"], rotation=30, ha="right", fontsize=8)
+        eixo.grid(True, axis="y", linestyle="--", alpha=0.5)
+    fig.tight_layout()
+    fig.savefig(caminho)
+    plt.close(fig)
+
+
+def _desenhar_paineis(dados, caminho):
+    # Um painel de barras por métrica, com as mesmas categorias no eixo x.
+    paineis = dados["paineis"]
+    colunas = min(len(paineis), 2)
+    linhas = (len(paineis) + colunas - 1) // colunas
+    fig, eixos = plt.subplots(linhas, colunas, figsize=(6 * colunas, 4 * linhas), squeeze=False)
+    x = range(len(dados["categorias"]))
+    for eixo, painel in zip(eixos.flat, paineis):
+        eixo.bar(x, painel["valores"], alpha=0.8, color="tab:green")
+        eixo.set_xticks(list(x))
+        eixo.set_xticklabels(dados["categorias"], rotation=20, ha="right", fontsize=8)
+        eixo.set_title(painel["titulo"])
+        eixo.set_ylabel(painel["ylabel"])
+        eixo.grid(True, axis="y", linestyle="--", alpha=0.5)
+    for eixo in list(eixos.flat)[len(paineis):]:
+        eixo.set_visible(False)
+    fig.suptitle(dados["titulo"])
+    fig.tight_layout()
+    fig.savefig(caminho)
+    plt.close(fig)
+
+
+def _desenhar_barras_agrupadas(dados, caminho):
+    # Uma barra por série dentro de cada categoria, com eixo y opcionalmente logarítmico.
+    plt.figure(figsize=(max(8, len(dados["categorias"]) * 1.2), 5))
+    largura = 0.8 / len(dados["series"])
+    x = range(len(dados["categorias"]))
+    for indice, serie in enumerate(dados["series"]):
+        deslocamento = (indice - (len(dados["series"]) - 1) / 2) * largura
+        plt.bar([p + deslocamento for p in x], serie["valores"], largura, label=serie["rotulo"], alpha=0.8)
+    plt.xticks(x, dados["categorias"], rotation=20, ha="right", fontsize=8)
+    if dados.get("log"):
+        plt.yscale("log")
+    plt.ylabel(dados["ylabel"])
+    plt.title(dados["titulo"])
     plt.legend()
-    plt.grid(True, linestyle="--", alpha=0.6)
+    plt.grid(True, axis="y", linestyle="--", alpha=0.5)
     plt.tight_layout()
-    plt.savefig(f"{PASTA_GRAFICOS}/tamanho_bases.png")
+    plt.savefig(caminho)
     plt.close()
 
+
+def _desenhar_soak(dados, caminho):
+    # Throughput, p99 (com picos destacados) e memória/CPU do cliente ao longo do tempo.
+    fig, (eixo_vazao, eixo_latencia, eixo_memoria) = plt.subplots(3, 1, figsize=(12, 9), sharex=True)
+    t = dados["segundo"]
+    eixo_vazao.plot(t, dados["throughput"], linewidth=0.8)
+    eixo_vazao.set_ylabel("Operações/s")
+    eixo_latencia.plot(t, dados["p99"], linewidth=0.8, label="p99")
+    eixo_latencia.plot(t, dados["p50"], linewidth=0.8, label="p50")
+    eixo_latencia.scatter(dados["picos_segundo"], dados["picos_p99"], color="red", s=15, zorder=3, label="pico")
+    eixo_latencia.set_ylabel("Latência (ms)")
+    eixo_latencia.legend()
+    eixo_memoria.plot(t, dados["rss"], color="tab:purple", linewidth=0.8, label="RSS do cliente (MB)")
+    eixo_memoria.set_ylabel("RSS (MB)")
+    eixo_cpu = eixo_memoria.twinx()
+    eixo_cpu.plot(t, dados["cpu"], color="tab:gray", linewidth=0.6, alpha=0.6)
+    eixo_cpu.set_ylabel("CPU do sistema (%)")
+    eixo_memoria.set_xlabel("Tempo (s)")
+    for eixo in (eixo_vazao, eixo_latencia, eixo_memoria):
+        eixo.grid(True, linestyle="--", alpha=0.5)
+    fig.suptitle(dados["titulo"])
+    fig.tight_layout()
+    fig.savefig(caminho)
+    plt.close(fig)
+
+
+def _desenhar_orquestrador(dados, caminho):
+    # Throughput por quantidade de clientes e, abaixo, a CPU do lado cliente contra o limiar de saturação.
+    fig, (eixo_vazao, eixo_cpu) = plt.subplots(2, 1, figsize=(9, 8), sharex=True)
+    x = dados["clientes"]
+    eixo_vazao.plot(x, dados["throughput"], marker="o")
+    eixo_vazao.set_ylabel("Operações/s")
+    eixo_vazao.set_title(dados["titulo"])
+    eixo_cpu.plot(x, dados["cpu_cliente_max"], marker="o", label="CPU do processo cliente (máx.)")
+    eixo_cpu.plot(x, dados["cpu_nucleos"], marker="s", label="Núcleos dos clientes (média)")
+    eixo_cpu.axhline(dados["limiar"], color="red", linestyle="--", linewidth=1, label="Limiar de saturação")
+    eixo_cpu.scatter([c for c, sat in zip(x, dados["saturado"]) if sat],
+                     [v for v, sat in zip(dados["cpu_cliente_max"], dados["saturado"]) if sat],
+                     color="red", s=40, zorder=3)
+    eixo_cpu.set_ylim(0, 105)
+    eixo_cpu.set_ylabel("CPU (%)")
+    eixo_cpu.set_xlabel("Processos clientes")
+    eixo_cpu.set_xticks(x)
+    eixo_cpu.legend()
+    for eixo in (eixo_vazao, eixo_cpu):
+        eixo.grid(True, linestyle="--", alpha=0.5)
+    fig.tight_layout()
+    fig.savefig(caminho)
+    plt.close(fig)
+
+
+DESENHISTAS = {
+    "barras": _desenhar_barras,
+    "linhas": _desenhar_linhas,
+    "transacoes": _desenhar_transacoes,
+    "leitura": _desenhar_leitura,
+    "paineis": _desenhar_paineis,
+    "barras_agrupadas": _desenhar_barras_agrupadas,
+    "soak": _desenhar_soak,
+    "orquestrador": _desenhar_orquestrador,
+}
+
+
+def _renderizar(tarefa):
+    # Ponto de entrada dos processos de renderização: recebe (tipo, dados, caminho).
+    tipo, dados, caminho = tarefa
+    DESENHISTAS[tipo](dados, caminho)
+    return caminho
+
+
+# =============================================================================================================
+# 🔹 Etapa 4: renderização incremental e paralela
+# =============================================================================================================
+def _assinatura(tipo, dados):
+    # Hash estável dos dados de entrada de um gráfico.
+    conteudo = json.dumps([VERSAO_GRAFICOS, tipo, dados], sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def renderizar_graficos(tarefas, paralelo=True, forcar=False):
+    """
+    Renderiza as tarefas (tipo, dados, caminho) pendentes em um pool de processos. Gráficos cujo arquivo
+    existe e cuja assinatura de entrada não mudou desde a última execução são pulados.
+    Retorna a lista de caminhos efetivamente gerados.
+    """
+    os.makedirs(PASTA_GRAFICOS, exist_ok=True)
+    try:
+        with open(ARQUIVO_CACHE, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    pendentes = []
+    for tipo, dados, caminho in tarefas:
+        assinatura = _assinatura(tipo, dados)
+        if not forcar and cache.get(caminho) == assinatura and os.path.exists(caminho):
+            continue
+        pendentes.append(((tipo, dados, caminho), assinatura))
+
+    if paralelo and len(pendentes) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(pendentes), os.cpu_count() or 1)) as pool:
+            gerados = list(pool.map(_renderizar, [t for t, _ in pendentes]))
+    else:
+        gerados = [_renderizar(t) for t, _ in pendentes]
+
+    for (_, _, caminho), assinatura in pendentes:
+        cache[caminho] = assinatura
+    with open(ARQUIVO_CACHE, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+
+    if len(pendentes) < len(tarefas):
+        print(f"[✔] {len(tarefas) - len(pendentes)} gráfico(s) sem alterações foram reaproveitados.")
+    return gerados
+
+
+# =============================================================================================================
+# 🔹 Função: montar_tarefas_comparativas
+# =============================================================================================================
+def montar_tarefas_comparativas(agregados):
+    # Converte os agregados nas tarefas de desenho dos quatro gráficos comparativos.
+    media, desvio, operacoes = agregados["media"], agregados["desvio"], agregados["operacoes"]
+
+    def barras(coluna_pg, coluna_mongo, ylabel, titulo):
+        return {
+            "operacoes": operacoes,
+            "pg": media[coluna_pg].tolist(),
+            "mongo": media[coluna_mongo].tolist(),
+            "pg_desvio": desvio[coluna_pg].tolist(),
+            "mongo_desvio": desvio[coluna_mongo].tolist(),
+            "ylabel": ylabel,
+            "titulo": titulo,
+        }
+
+    return [
+        ("barras", barras("tempo_pg_ms", "tempo_mongo_ms", "Tempo médio (ms)",
+                          "Comparativo de tempo por tipo de operação"),
+         f"{PASTA_GRAFICOS}/tempo_por_operacao.png"),
+        ("barras", barras("throughput_pg_ops_s", "throughput_mongo_ops_s", "Throughput (operações/segundo)",
+                          "Comparativo de throughput por tipo de operação"),
+         f"{PASTA_GRAFICOS}/throughput_por_operacao.png"),
+        ("linhas", {
+            "operacoes": operacoes,
+            "series": [
+                {"valores": media["cpu_media_%"].tolist(), "marcador": "o", "rotulo": "CPU (%)"},
+                {"valores": media["memoria_media_MB"].tolist(), "marcador": "s", "rotulo": "Memória (MB)"},
+            ],
+            "ylabel": "Uso médio",
+            "titulo": "Uso médio de CPU e memória por operação",
+        }, f"{PASTA_GRAFICOS}/cpu_memoria_por_operacao.png"),
+        ("linhas", {
+            "operacoes": operacoes,
+            "series": [
+                {"valores": media["tam_pg_MB"].tolist(), "marcador": "o", "rotulo": "PostgreSQL (MB)"},
+                {"valores": media["tam_mongo_MB"].tolist(), "marcador": "s", "rotulo": "MongoDB (MB)"},
+            ],
+            "ylabel": "Tamanho (MB)",
+            "titulo": "Tamanho das bases de dados após cada operação",
+        }, f"{PASTA_GRAFICOS}/tamanho_bases.png"),
+    ]
+
+
+# =============================================================================================================
+# 🔹 Função: gerar_graficos_comparativos
+# =============================================================================================================
+def gerar_graficos_comparativos(resultados, agregados=None, paralelo=True):
+    # Gera gráficos comparativos de tempo, throughput, CPU, memória e tamanho das bases.
+    if agregados is None:
+        agregados = calcular_agregados(carregar_resultados(resultados))
+    gerados = renderizar_graficos(montar_tarefas_comparativas(agregados), paralelo=paralelo)
     print("[✔] Gráficos comparativos gerados com sucesso.")
+    return gerados
+
+
+# =============================================================================================================
+# 🔹 Função: gerar_graficos_transacoes
+# =============================================================================================================
+def gerar_graficos_transacoes(resultados):
+    # Gera o gráfico de latência por COMMIT x throughput para cada tamanho de transação e banco.
+    df = carregar_resultados(resultados)
+    df["tamanho_transacao"] = df["tamanho_transacao"].astype(str)
+    dados = {}
+    for (operacao, banco), grupo in df.groupby(["operacao", "banco"], sort=False):
+        dados.setdefault(operacao, {})[banco] = {
+            "tamanhos": grupo["tamanho_transacao"].tolist(),
+            "latencia": grupo["latencia_media_ms"].tolist(),
+            "throughput": grupo["throughput_linhas_s"].tolist(),
+        }
+    renderizar_graficos([("transacoes", dados, f"{PASTA_GRAFICOS}/transacoes_latencia_throughput.png")])
+    print("[✔] Gráfico de granularidade de transação gerado com sucesso.")
+
+
+# =============================================================================================================
+# 🔹 Função: gerar_graficos_leitura
+# =============================================================================================================
+def gerar_graficos_leitura(resultados):
+    # Gera o gráfico de vazão (linhas/s) e pico de memória do cliente por estratégia de leitura.
+    df = carregar_resultados(resultados)
+    dados = {
+        "rotulos": [f"{b}\n{e}" for b, e in zip(df["banco"], df["estrategia"])],
+        "bancos": df["banco"].tolist(),
+        "linhas_s": df["linhas_s"].tolist(),
+        "pico_rss": df["pico_rss_MB"].tolist(),
+        "pico_python": df["pico_python_MB"].tolist(),
+    }
+    renderizar_graficos([("leitura", dados, f"{PASTA_GRAFICOS}/estrategias_leitura.png")])
+    print("[✔] Gráfico de estratégias de leitura gerado com sucesso.")
+
+
+# =============================================================================================================
+# 🔹 Função: gerar_graficos_modelos_mongo
+# =============================================================================================================
+def gerar_graficos_modelos_mongo(resultados):
+    # Gera os painéis de leitura, escrita e armazenamento para cada modelo de documento do MongoDB.
+    df = carregar_resultados(resultados)
+    dados = {
+        "titulo": "Modelos de documento no MongoDB: custo de leitura, escrita e armazenamento",
+        "categorias": df["modelo"].tolist(),
+        "paineis": [
+            {"titulo": "SELECT (500 pedidos)", "ylabel": "Tempo (ms)", "valores": df["tempo_select_ms"].tolist()},
+            {"titulo": "Sincronização (escrita inicial)", "ylabel": "Tempo (ms)",
+             "valores": df["tempo_sincronizacao_ms"].tolist()},
+            {"titulo": "Renomear produto (propagação)", "ylabel": "Tempo (ms)",
+             "valores": df["tempo_atualizacao_produto_ms"].tolist()},
+            {"titulo": "Armazenamento (dados + índices)", "ylabel": "MB",
+             "valores": df["armazenamento_MB"].tolist()},
+        ],
+    }
+    renderizar_graficos([("paineis", dados, f"{PASTA_GRAFICOS}/modelos_mongo.png")])
+    print("[✔] Gráfico de modelos de documento gerado com sucesso.")
+
+
+# =============================================================================================================
+# 🔹 Função: gerar_graficos_analiticos
+# =============================================================================================================
+def gerar_graficos_analiticos(resultados):
+    # Gera a latência por relatório e variante, e o custo de atualização x janela de desatualização por banco.
+    df = carregar_resultados(resultados)
+    latencias = df.pivot_table(index=["banco", "relatorio"], columns="variante", values="latencia_mediana_ms",
+                               sort=False)
+    manutencao = df[df["variante"] != "direto"].groupby(["banco", "variante"], sort=False).first().reset_index()
+
+    tarefas = [
+        ("barras_agrupadas", {
+            "categorias": [f"{b}\n{r}" for b, r in latencias.index],
+            "series": [{"rotulo": v, "valores": latencias[v].tolist()} for v in latencias.columns],
+            "ylabel": "Latência mediana (ms, escala log)",
+            "titulo": "Relatórios analíticos: consulta direta x agregados mantidos x cache",
+            "log": True,
+        }, f"{PASTA_GRAFICOS}/analitico_latencia.png"),
+        ("paineis", {
+            "titulo": "Manutenção dos agregados",
+            "categorias": [f"{b}\n{v}" for b, v in zip(manutencao["banco"], manutencao["variante"])],
+            "paineis": [
+                {"titulo": "Custo de atualização (todos os relatórios)", "ylabel": "Tempo (ms)",
+                 "valores": manutencao["tempo_refresh_ms"].tolist()},
+                {"titulo": "Janela máxima de desatualização", "ylabel": "Segundos",
+                 "valores": manutencao["janela_desatualizacao_max_s"].tolist()},
+            ],
+        }, f"{PASTA_GRAFICOS}/analitico_manutencao.png"),
+    ]
+    renderizar_graficos(tarefas)
+    print("[✔] Gráficos da carga analítica gerados com sucesso.")
+
+
+# =============================================================================================================
+# 🔹 Função: gerar_graficos_soak
+# =============================================================================================================
+def gerar_graficos_soak(janelas):
+    # Gera uma linha do tempo por banco com throughput, latência e memória do teste de longa duração.
+    df = carregar_resultados(janelas)
+    tarefas = []
+    for banco, grupo in df.groupby("banco", sort=False):
+        picos = grupo[grupo["pico"].astype(bool)]
+        tarefas.append(("soak", {
+            "titulo": f"Soak {banco}: throughput, latência e memória por segundo",
+            "segundo": grupo["segundo"].tolist(),
+            "throughput": grupo["throughput_ops_s"].tolist(),
+            "p50": grupo["latencia_p50_ms"].tolist(),
+            "p99": grupo["latencia_p99_ms"].tolist(),
+            "picos_segundo": picos["segundo"].tolist(),
+            "picos_p99": picos["latencia_p99_ms"].tolist(),
+            "rss": grupo["rss_cliente_MB"].tolist(),
+            "cpu": grupo["cpu_%"].tolist(),
+        }, f"{PASTA_GRAFICOS}/soak_{banco.lower()}.png"))
+    renderizar_graficos(tarefas)
+    print("[✔] Gráficos do soak gerados com sucesso.")
+
+
+def gerar_graficos_orquestrador(resultados, limiar=90.0):
+    # Gera, por banco, o throughput por quantidade de clientes e a saturação de CPU do lado cliente.
+    df = carregar_resultados(resultados)
+    tarefas = []
+    for banco, grupo in df.groupby("banco", sort=False):
+        grupo = grupo.sort_values("clientes")
+        tarefas.append(("orquestrador", {
+            "titulo": f"{banco}: throughput x processos clientes",
+            "clientes": grupo["clientes"].tolist(),
+            "throughput": grupo["throughput_ops_s"].tolist(),
+            "cpu_cliente_max": grupo["cpu_cliente_max_%"].tolist(),
+            "cpu_nucleos": grupo["cpu_nucleos_clientes_%"].tolist(),
+            "saturado": grupo["cliente_saturado"].astype(bool).tolist(),
+            "limiar": limiar,
+        }, f"{PASTA_GRAFICOS}/orquestrador_{banco.lower()}.png"))
+    renderizar_graficos(tarefas)
+    print("[✔] Gráficos do orquestrador gerados com sucesso.")
 
 
 # ==============================================================================================================
 # 🔹 Função: gerar_resumo_textual
 # ==============================================================================================================
-    def gerar_resumo_textual():
-        # Gera um resumo estatístico com base nas métricas do CSV.
+def gerar_resumo_textual(agregados=None):
+    # Gera um resumo estatístico com base nas métricas agregadas (por padrão, lidas do CSV).
+    if agregados is None:
         if not os.path.exists(ARQUIVO_CSV):
             print(f"[⚠] Arquivo {ARQUIVO_CSV} não encontrado.")
             return
+        agregados = calcular_agregados(carregar_resultados(ARQUIVO_CSV))
 
-        df = pd.read_csv(ARQUIVO_CSV)
-        resumo = []
+    geral = agregados["geral"]
+    resumo = []
 
-        resumo.append("=== RESUMO DE DESEMPENHO DO BENCHMARK ===\n")
-        resumo.append(f"Operações testadas: {', '.join(df['operacao'])}\n")
-        resumo.append(f"Tempo médio PostgreSQL (ms): {df['tempo_pg_ms'].mean():.2f}")
-        resumo.append(f"Tempo médio MongoDB (ms): {df['tempo_mongo_ms'].mean():.2f}")
-        resumo.append(f"Throughput médio PostgreSQL (ops/s): {df['throughput_pg_ops_s'].mean():.2f}")
-        resumo.append(f"Throughput médio MongoDB (ops/s): {df['throughput_mongo_ops_s'].mean():.2f}")
-        resumo.append(f"Uso médio de CPU: {df['cpu_media_%'].mean():.2f}%")
-        resumo.append(f"Uso médio de memória: {df['memoria_media_MB'].mean():.2f} MB")
-        resumo.append(f"Tamanho médio PostgreSQL: {df['tam_pg_MB'].mean():.2f} MB")
-        resumo.append(f"Tamanho médio MongoDB: {df['tam_mongo_MB'].mean():.2f} MB")
+    resumo.append("=== RESUMO DE DESEMPENHO DO BENCHMARK ===\n")
+    resumo.append(f"Operações testadas: {', '.join(agregados['operacoes'])}")
+    resumo.append(f"Execuções consideradas: {agregados['execucoes']}\n")
+    resumo.append(f"Tempo médio PostgreSQL (ms): {geral['tempo_pg_ms']:.2f}")
+    resumo.append(f"Tempo médio MongoDB (ms): {geral['tempo_mongo_ms']:.2f}")
+    resumo.append(f"Throughput médio PostgreSQL (ops/s): {geral['throughput_pg_ops_s']:.2f}")
+    resumo.append(f"Throughput médio MongoDB (ops/s): {geral['throughput_mongo_ops_s']:.2f}")
+    resumo.append(f"Uso médio de CPU: {geral['cpu_media_%']:.2f}%")
+    resumo.append(f"Uso médio de memória: {geral['memoria_media_MB']:.2f} MB")
+    resumo.append(f"Tamanho médio PostgreSQL: {geral['tam_pg_MB']:.2f} MB")
+    resumo.append(f"Tamanho médio MongoDB: {geral['tam_mongo_MB']:.2f} MB")
 
-        os.makedirs(PASTA_GRAFICOS, exist_ok=True)
-        arquivo_resumo = f"{PASTA_GRAFICOS}/resumo_metricas.txt"
-        with open(arquivo_resumo, "w", encoding="utf-8") as f:
-            f.write("\n".join(resumo))
+    os.makedirs(PASTA_GRAFICOS, exist_ok=True)
+    arquivo_resumo = f"{PASTA_GRAFICOS}/resumo_metricas.txt"
+    with open(arquivo_resumo, "w", encoding="utf-8") as f:
+        f.write("\n".join(resumo))
 
-        print(f"[✔] Resumo salvo em {arquivo_resumo}")
+    print(f"[✔] Resumo salvo em {arquivo_resumo}")
 
 
 # ==============================================================================================================
 # 🔹 Função: análise consolidada
 # ==============================================================================================================
-    def analisar_resultados_completos():
-        # Lê o arquivo CSV de resultados e gera todos os gráficos e o resumo.
-        if not os.path.exists(ARQUIVO_CSV):
-            print(f"[⚠] Nenhum resultado encontrado em {ARQUIVO_CSV}.")
-            return
+def analisar_resultados_completos(origem=ARQUIVO_CSV, paralelo=True):
+    # Lê os resultados uma única vez e gera todos os gráficos e o resumo a partir dos mesmos agregados.
+    df = carregar_resultados(origem)
+    if df.empty:
+        print(f"[⚠] Nenhum resultado encontrado em {origem}.")
+        return
 
-        df = pd.read_csv(ARQUIVO_CSV)
-        print("\n=== Resumo das Operações Testadas ===")
-        print(df[["operacao", "tempo_pg_ms", "tempo_mongo_ms", "throughput_pg_ops_s", "throughput_mongo_ops_s"]])
+    agregados = calcular_agregados(df)
+    print("\n=== Resumo das Operações Testadas ===")
+    print(agregados["media"][["tempo_pg_ms", "tempo_mongo_ms", "throughput_pg_ops_s", "throughput_mongo_ops_s"]]
+          .to_string())
 
-        gerar_graficos_comparativos(df.to_dict(orient="records"))
-        gerar_resumo_textual()
-        print("\n[✔] Todos os gráficos e análises foram gerados com sucesso!")
+    gerar_graficos_comparativos(None, agregados=agregados, paralelo=paralelo)
+    gerar_resumo_textual(agregados)
+    print("\n[✔] Todos os gráficos e análises foram gerados com sucesso!")
 
 
 # ==============================================================================================================
 # 🔹 Execução direta
 # ==============================================================================================================
 if __name__ == "__main__":
-    analisar_resultados_completos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gera gráficos e resumo a partir dos resultados do benchmark.")
+    parser.add_argument("arquivos", nargs="*", default=[ARQUIVO_CSV],
+                        help="CSVs de resultados (aceita padrões glob; várias execuções são agregadas)")
+    parser.add_argument("--historico", nargs="+", metavar="SELETOR",
+                        help="agrega execuções do histórico SQLite (run_ids ou rótulos) em vez de CSVs")
+    parser.add_argument("--sequencial", action="store_true", help="renderiza os gráficos sem pool de processos")
+    args = parser.parse_args()
+    origem = carregar_resultados_historico(args.historico) if args.historico else args.arquivos
+    analisar_resultados_completos(origem, paralelo=not args.sequencial)
@@ -0,0 +1,121 @@
+"""
+Perfilamento opcional do lado cliente das operações do benchmark, em um de três modos por execução:
+  - tempo:    divide o tempo total em CPU do cliente (thread que executa a operação) e espera pelo servidor,
+              sem nenhum profiler ativo — colunas cpu_cliente_ms e espera_servidor_ms;
+  - cprofile: grava o cProfile/pstats de cada operação (.prof e top de funções em texto);
+  - memoria:  mede o pico de alocações Python com o tracemalloc — coluna pico_memoria_MB.
+Os modos não são combinados porque cProfile e tracemalloc consomem CPU no próprio Python e inflariam
+justamente a parcela "CPU do cliente"; as operações não são idempotentes, então cada modo é uma execução.
+"""
+
+import cProfile
+import csv
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PASTA_PERFIS = "logs/perfis"
+MODOS_PERFIL = ("tempo", "cprofile", "memoria")
+
+
+class ProfilerOperacao:
+    def __init__(self, nome, modo="tempo"):
+        if modo not in MODOS_PERFIL:
+            raise ValueError(f"Modo de perfilamento inválido: {modo} (use um de {MODOS_PERFIL}).")
+        self.nome = nome
+        self.modo = modo
+        self.perfil_cpu = modo == "cprofile"
+        self.memoria = modo == "memoria"
+        self.profiler = None
+        self.stats = {}
+
+    def start(self):
+        self._iniciou_tracemalloc = self.memoria and not tracemalloc.is_tracing()
+        if self._iniciou_tracemalloc:
+            tracemalloc.start()
+        elif self.memoria:
+            tracemalloc.reset_peak()
+        if self.perfil_cpu:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        # thread_time considera apenas a thread atual, excluindo o ResourceMonitor
+        self._inicio_cpu = time.thread_time()
+        self._inicio = time.perf_counter()
+
+    def stop(self):
+        tempo_total = (time.perf_counter() - self._inicio) * 1000
+        cpu_cliente = (time.thread_time() - self._inicio_cpu) * 1000
+        if self.profiler:
+            self.profiler.disable()
+        self.stats = {"tempo_total_ms": round(tempo_total, 2)}
+        if self.modo == "tempo":
+            self.stats["cpu_cliente_ms"] = round(cpu_cliente, 2)
+            self.stats["espera_servidor_ms"] = round(max(tempo_total - cpu_cliente, 0), 2)
+        if self.memoria:
+            self.stats["pico_memoria_MB"] = round(tracemalloc.get_traced_memory()[1] / (1024 ** 2), 3)
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+
+    def get_stats(self):
+        return self.stats
+
+    def salvar(self, pasta, top=30):
+        """Grava o .prof (abrível com snakeviz/pstats), o top de funções em texto e uma linha no resumo CSV."""
+        os.makedirs(pasta, exist_ok=True)
+        if self.profiler:
+            self.profiler.dump_stats(os.path.join(pasta, f"{self.nome}.prof"))
+            saida = io.StringIO()
+            pstats.Stats(self.profiler, stream=saida).sort_stats("cumulative").print_stats(top)
+            with open(os.path.join(pasta, f"{self.nome}.txt"), "w", encoding="utf-8") as f:
+                f.write(saida.getvalue())
+
+        arquivo_resumo = os.path.join(pasta, "resumo_perfis.csv")
+        novo = not os.path.exists(arquivo_resumo)
+        with open(arquivo_resumo, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["etapa"] + list(self.stats.keys()))
+            if novo:
+                writer.writeheader()
+            writer.writerow({"etapa": self.nome, **self.stats})
+
+
+# =============================================================================================================
+# 🔹 Atalho: perfilar um bloco somente quando o perfilamento estiver habilitado
+# =============================================================================================================
+@contextmanager
+def perfilar(nome, pasta=None, logger=None, modo="tempo"):
+    """
+    Perfila o bloco no `modo` indicado e salva o resultado em `pasta`. Com `pasta=None` (padrão) não faz
+    nada e entrega None, para que o perfilamento fique desligado sem custo nas execuções normais.
+    """
+    if pasta is None:
+        yield None
+        return
+
+    perfil = ProfilerOperacao(nome, modo)
+    perfil.start()
+    try:
+        yield perfil
+    finally:
+        perfil.stop()
+        perfil.salvar(pasta)
+        if logger:
+            detalhes = ", ".join(f"{chave} {valor}" for chave, valor in perfil.get_stats().items())
+            logger.info(f"Perfil {nome} ({modo}): {detalhes}.")
+
+
+def colunas_perfil(perfil, sufixo):
+    """
+    Converte as estatísticas do perfil em colunas extras da linha de resultados (ex.: cpu_cliente_pg_ms). Só
+    entram as colunas produzidas pelo modo do perfil; o modo cprofile não acrescenta colunas.
+    """
+    if perfil is None:
+        return {}
+    colunas = {
+        "cpu_cliente_ms": f"cpu_cliente_{sufixo}_ms",
+        "espera_servidor_ms": f"espera_servidor_{sufixo}_ms",
+        "pico_memoria_MB": f"pico_memoria_{sufixo}_MB",
+    }
+    return {colunas[chave]: valor for chave, valor in perfil.get_stats().items() if chave in colunas}
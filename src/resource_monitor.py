@@ -2,18 +2,24 @@ import psutil
 import threading
 import time
 import statistics
+import sys
 
 class ResourceMonitor:
     def __init__(self, interval=0.5):
         self.interval = interval
         self.cpu_samples = []
         self.mem_samples = []
+        self.rss_samples = []  # memória residente do próprio processo cliente (MB)
+        self.timestamps = []  # instantes (time.monotonic) de cada amostra
         self.running = False
+        self.processo = psutil.Process()
 
     def _monitor(self):
         while self.running:
+            self.timestamps.append(time.monotonic())
             self.cpu_samples.append(psutil.cpu_percent(interval=None))
             self.mem_samples.append(psutil.virtual_memory().used / (1024 ** 2))
+            self.rss_samples.append(self.processo.memory_info().rss / (1024 ** 2))
             time.sleep(self.interval)
 
     def start(self):
@@ -31,4 +37,15 @@ class ResourceMonitor:
         return {
             "cpu_avg": round(statistics.mean(self.cpu_samples), 2),
             "mem_avg": round(statistics.mean(self.mem_samples), 2)
-        }
\ No newline at end of file
+        }
+
+
+def pico_memoria_processo_mb():
+    """Pico de memória residente (RSS) do processo atual desde o seu início, em MB."""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é informado em KB no Linux e em bytes no macOS
+        return pico / (1024 ** 2) if sys.platform == "darwin" else pico / 1024
+    except ImportError:  # Windows
+        return psutil.Process().memory_info().peak_wset / (1024 ** 2)
@@ -0,0 +1,182 @@
+"""
+Rastreamento estruturado (spans) das fases do benchmark.
+Cada span registra nome, instantes monotônicos de início/fim, atributos (banco, operação, linhas, tamanho de
+lote...) e o vínculo com o span pai. Os spans são gravados em JSON lines com campos no formato do
+OpenTelemetry e podem ser convertidos para o formato Chrome Trace, para visualizar a linha do tempo
+(chrome://tracing ou https://ui.perfetto.dev) de uma execução inteira offline.
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+ARQUIVO_SPANS = "logs/spans.jsonl"
+
+_span_atual = contextvars.ContextVar("span_atual", default=None)
+_tracer = None
+
+
+class Span:
+    def __init__(self, tracer, nome, pai, atributos):
+        self.tracer = tracer
+        self.nome = nome
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = pai.span_id if pai else None
+        self.atributos = dict(atributos)
+        self.status = "OK"
+        self.inicio_ns = time.monotonic_ns()
+        self.fim_ns = None
+
+    def set_atributo(self, chave, valor):
+        self.atributos[chave] = valor
+
+    def para_dict(self):
+        """Representação compatível com o modelo de span do OpenTelemetry (mais os instantes monotônicos)."""
+        return {
+            "trace_id": self.tracer.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.nome,
+            "start_time_unix_nano": self.tracer.para_epoch_ns(self.inicio_ns),
+            "end_time_unix_nano": self.tracer.para_epoch_ns(self.fim_ns),
+            "monotonic_start_ns": self.inicio_ns,
+            "monotonic_end_ns": self.fim_ns,
+            "duration_ms": round((self.fim_ns - self.inicio_ns) / 1e6, 3),
+            "attributes": self.atributos,
+            "status": self.status,
+            "thread": threading.current_thread().name,
+        }
+
+
+class _SpanNulo:
+    # Usado quando nenhum tracer foi configurado: aceita atributos e não registra nada.
+    def set_atributo(self, chave, valor):
+        pass
+
+
+class Tracer:
+    def __init__(self, arquivo=ARQUIVO_SPANS, servico="benchmark_bd"):
+        self.arquivo = arquivo
+        self.servico = servico
+        self.trace_id = uuid.uuid4().hex
+        # Âncora única entre relógio monotônico e relógio de parede
+        self._base_monotonica = time.monotonic_ns()
+        self._base_epoch = time.time_ns()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(arquivo) or ".", exist_ok=True)
+        self._saida = open(arquivo, "a", encoding="utf-8")
+
+    def para_epoch_ns(self, instante_monotonico):
+        return self._base_epoch + (instante_monotonico - self._base_monotonica)
+
+    @contextmanager
+    def span(self, nome, **atributos):
+        """Abre um span filho do span atual; ao sair, grava-o imediatamente no arquivo."""
+        s = Span(self, nome, _span_atual.get(), {"servico": self.servico, **atributos})
+        token = _span_atual.set(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.status = "ERROR"
+            s.atributos["erro"] = repr(e)
+            raise
+        finally:
+            s.fim_ns = time.monotonic_ns()
+            _span_atual.reset(token)
+            self._exportar(s)
+
+    def _exportar(self, s):
+        linha = json.dumps(s.para_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._saida.write(linha + "\n")
+            self._saida.flush()
+
+    def fechar(self):
+        with self._lock:
+            self._saida.close()
+
+
+# =============================================================================================================
+# 🔹 Tracer global (mesmo padrão do logger: configurado uma vez, usado em qualquer módulo)
+# =============================================================================================================
+def configurar_tracer(arquivo=ARQUIVO_SPANS):
+    """Cria o tracer da execução; todos os spans abertos com `span()` passam a ser gravados em `arquivo`."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.fechar()
+    _tracer = Tracer(arquivo)
+    return _tracer
+
+
+def encerrar_tracer():
+    global _tracer
+    if _tracer is not None:
+        _tracer.fechar()
+        _tracer = None
+
+
+def span_atual():
+    """Span aberto no contexto atual (ou um span nulo), para que funções internas anotem atributos nele."""
+    return _span_atual.get() or _SpanNulo()
+
+
+@contextmanager
+def span(nome, **atributos):
+    """Abre um span no tracer global. Sem tracer configurado, não registra nada."""
+    if _tracer is None:
+        yield _SpanNulo()
+        return
+    with _tracer.span(nome, **atributos) as s:
+        yield s
+
+
+# =============================================================================================================
+# 🔹 Conversão para Chrome Trace (linha do tempo / flame view)
+# =============================================================================================================
+def exportar_chrome_trace(arquivo_spans=ARQUIVO_SPANS, destino=None, trace_id=None):
+    """
+    Converte os spans gravados em eventos "X" do formato Chrome Trace. Por padrão usa o trace mais recente
+    do arquivo. Retorna o caminho gerado.
+    """
+    with open(arquivo_spans, encoding="utf-8") as f:
+        spans = [json.loads(linha) for linha in f if linha.strip()]
+    if not spans:
+        raise ValueError(f"Nenhum span encontrado em {arquivo_spans}.")
+    trace_id = trace_id or spans[-1]["trace_id"]
+    spans = [s for s in spans if s["trace_id"] == trace_id]
+    origem = min(s["monotonic_start_ns"] for s in spans)
+
+    eventos = [
+        {
+            "name": s["name"],
+            "cat": s["attributes"].get("banco", "benchmark"),
+            "ph": "X",
+            "ts": (s["monotonic_start_ns"] - origem) / 1000,
+            "dur": (s["monotonic_end_ns"] - s["monotonic_start_ns"]) / 1000,
+            "pid": 1,
+            "tid": s["thread"],
+            "args": {**s["attributes"], "span_id": s["span_id"], "parent_span_id": s["parent_span_id"]},
+        }
+        for s in spans
+    ]
+    destino = destino or os.path.join(os.path.dirname(arquivo_spans), f"trace_{trace_id[:8]}.json")
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return destino
+
+
+# ==============================================================================================================
+# 🔹 Execução direta
+# ==============================================================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte os spans do benchmark para o formato Chrome Trace.")
+    parser.add_argument("arquivo", nargs="?", default=ARQUIVO_SPANS)
+    parser.add_argument("--trace-id", help="trace a exportar (padrão: o mais recente)")
+    parser.add_argument("--destino")
+    args = parser.parse_args()
+    print(f"[✔] Linha do tempo salva em {exportar_chrome_trace(args.arquivo, args.destino, args.trace_id)}")
@@ -0,0 +1,36 @@
+"""
+Funções auxiliares compartilhadas pelos módulos de acesso aos bancos e de benchmark.
+"""
+
+import math
+
+
+def dividir_em_lotes(itens, tamanho):
+    """Divide a lista em lotes de `tamanho` elementos (None = lote único com todos)."""
+    if not tamanho:
+        return [itens] if itens else []
+    return [itens[i:i + tamanho] for i in range(0, len(itens), tamanho)]
+
+
+# Histograma de latências com baldes logarítmicos (~1% de resolução): pode ser somado entre processos
+# (Counter + Counter) e fornece percentis de toda a amostra sem transportar cada medição.
+_RAZAO_BALDE = 1.01
+
+
+def balde_latencia(latencia_ms):
+    """Índice do balde logarítmico da latência (ms); latências abaixo de 1 ns caem no balde do 1 ns."""
+    return math.floor(math.log(max(latencia_ms, 1e-6), _RAZAO_BALDE))
+
+
+def percentil_histograma(histograma, percentil):
+    """Percentil (0-100) de um histograma {balde: contagem}, no ponto médio geométrico do balde."""
+    total = sum(histograma.values())
+    if not total:
+        return 0
+    alvo = percentil / 100 * total
+    acumulado = 0
+    for balde in sorted(histograma):
+        acumulado += histograma[balde]
+        if acumulado >= alvo:
+            return _RAZAO_BALDE ** (balde + 0.5)
+    return _RAZAO_BALDE ** (max(histograma) + 0.5)